@@ -0,0 +1,227 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Static assets with content-hashed names.
+
+The templates refer to the style sheets and scripts of ``static``
+through two global functions, instead of by their names:
+
+* ``asset_url(path)``: a single file, such as ``css/style_light.css``.
+* ``asset_bundle(name, *paths)``: several files joined, in order, into
+  a single one, named after ``name``, such as ``css/site.css``.
+
+Both return the path of a new file in ``static``, relative to the root
+of the website, with the digest of its content in the name, such as
+``static/css/site.3f2a9c01d4.css``.  So the URL of an asset changes
+whenever its content changes, and the web server can let the browsers
+keep every asset for as long as they want.  The style sheets are also
+minified, with :func:`minify_css`::
+
+    <link rel="stylesheet" type=text/css
+          href="{{ base_uri }}{{ asset_bundle('css/site.css',
+                                              'css/reset.css',
+                                              'css/pygments.css') }}">
+
+Every asset is made once per build, the first time a template asks for
+it, and only written if it has changed.  The assets of the previous
+builds with the same name, but another digest, are removed then.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import hashlib
+import os
+import re
+
+from pynfact.fileman import write_if_changed
+
+
+# Comments, strings, and ``url()`` values, found from left to right
+# (so a quote in a comment, or a comment in a string, is not mistaken)
+CSS_LITERAL_RE = re.compile(
+    r'''(/\*.*?\*/|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\([^)]*\))''',
+    re.DOTALL | re.IGNORECASE)
+
+# White space that can be removed, around punctuation
+CSS_SPACES_RE = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON_RE = re.compile(r'(:)\s+')
+CSS_LAST_SEMICOLON_RE = re.compile(r';+}')
+
+# Digest in the name of an asset, as in :func:`hashed_name`
+HASHED_NAME_RE = r'\.[0-9a-f]{10}'
+
+
+def minify_css(text):
+    """Remove the comments and the needless white space of a style sheet.
+
+    Strings, ``url()`` values and comments starting with ``/*!`` are
+    kept as they are, and so is the white space before a colon, which
+    separates a selector from a pseudo-class (``a :hover`` is not
+    ``a:hover``).
+
+    :param text: Style sheet
+    :type text: str
+    :return: Minified style sheet
+    :rtype: str
+
+    :Example:
+
+    >>> minify_css('a > b {\\n  color : red;\\n}  /* note */')
+    'a>b{color :red}'
+    """
+    parts = CSS_LITERAL_RE.split(text)
+    for index, part in enumerate(parts):
+        if index % 2:
+            if part.startswith('/*') and not part.startswith('/*!'):
+                parts[index] = ''
+            continue
+        code = re.sub(r'\s+', ' ', part)
+        code = CSS_SPACES_RE.sub(r'\1', code)
+        code = CSS_COLON_RE.sub(r'\1', code)
+        parts[index] = code
+
+    return CSS_LAST_SEMICOLON_RE.sub('}', ''.join(parts)).strip()
+
+
+def hashed_name(path, content):
+    """Add the digest of the content to a file name.
+
+    :param path: File name
+    :type path: str
+    :param content: Content of the file
+    :type content: bytes
+    :return: File name, with the digest before the extension
+    :rtype: str
+
+    :Example:
+
+    >>> hashed_name('css/site.css', b'a{}')
+    'css/site.0bdc3e3fac.css'
+    """
+    root, ext = os.path.splitext(path)
+    return '{}.{}{}'.format(root, hashlib.sha1(content).hexdigest()[:10],
+                            ext)
+
+
+class AssetPipeline:
+    """Make the assets asked for by the templates, once per build.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, src_dir='static', dst_dir='_build/static',
+                 minify=True, encoding='utf-8', logger=None):
+        """Constructor.
+
+        :param src_dir: Directory of the static files of the website
+        :type src_dir: str
+        :param dst_dir: Directory where to write the assets
+        :type dst_dir: str
+        :param minify: Minify the style sheets
+        :type minify: bool
+        :param encoding: Encoding of the style sheets and scripts
+        :type encoding: str
+        :param logger: Logger where to store activity in
+        :type logger: logging.Logger
+        """
+        self.src_dir = src_dir
+        self.dst_dir = dst_dir
+        self.minify = minify
+        self.encoding = encoding
+        self.logger = logger
+        self.urls = dict()
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+        self.removed = 0
+
+    def url(self, path):
+        """Get the path of a single asset, relative to the website.
+
+        :param path: File, relative to the static directory
+        :type path: str
+        :return: Path of the asset, with its digest in the name
+        :rtype: str
+        """
+        return self.bundle(path, path)
+
+    def bundle(self, name, *paths):
+        """Get the path of a bundle of assets, relative to the website.
+
+        :param name: Name of the bundle, relative to the static
+            directory, whose extension tells the kind of files
+        :type name: str
+        :param paths: Files to join, relative to the static directory
+        :type paths: str
+        :return: Path of the bundle, with its digest in the name
+        :rtype: str
+        :raise FileNotFoundError: If one of the files does not exist
+        """
+        key = (name,) + paths
+        if key not in self.urls:
+            content = self._join(name, paths)
+            target = hashed_name(name, content)
+            output = os.path.join(self.dst_dir, target)
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            if write_if_changed(output, content):
+                self.written += 1
+                self.bytes_written += len(content)
+                self.logger and self.logger.debug(
+                    'Updated content of: "{}"'.format(output))
+            else:
+                self.unchanged += 1
+            self._remove_stale(output)
+            self.urls[key] = '/'.join(
+                (os.path.basename(self.dst_dir), target.replace(os.sep,
+                                                                '/')))
+
+        return self.urls.get(key)
+
+    def _remove_stale(self, output):
+        """Remove the previous versions of an asset, but the current.
+
+        They are the files next to it with the same name, but another
+        digest, as in :func:`hashed_name`.
+        """
+        directory, current = os.path.split(output)
+        root, ext = os.path.splitext(current)
+        stale_re = re.compile(re.escape(root[:-11]) + HASHED_NAME_RE +
+                              re.escape(ext) + '$')
+        for name in os.listdir(directory):
+            if name == current or not stale_re.match(name):
+                continue
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                continue
+            self.removed += 1
+            self.logger and self.logger.debug(
+                'Removed stale asset: "{}"'.format(
+                    os.path.join(directory, name)))
+
+    def _join(self, name, paths):
+        """Read and join the files of a bundle, minifying them.
+
+        Style sheets and scripts are read as text, and joined with a
+        new line (and a semicolon, for the scripts, in case one of them
+        does not end its last statement); any other file is taken as
+        is, and a bundle of them is just their concatenation.
+        """
+        ext = os.path.splitext(name)[1].lower()
+        if ext not in ('.css', '.js'):
+            content = b''
+            for path in paths:
+                with open(os.path.join(self.src_dir, path), 'rb') as f:
+                    content += f.read()
+            return content
+
+        texts = []
+        for path in paths:
+            with open(os.path.join(self.src_dir, path),
+                      encoding=self.encoding) as f:
+                texts.append(f.read())
+        text = (';\n' if ext == '.js' else '\n').join(texts)
+        if ext == '.css' and self.minify:
+            text = minify_css(text)
+        return text.encode(self.encoding)
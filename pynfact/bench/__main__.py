@@ -0,0 +1,237 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Command line interface of the benchmark suite.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import argparse
+import json
+import sys
+
+from pynfact.bench import imports, mdcompare, micro
+from pynfact.bench.micro import THRESHOLDS_FILE
+from pynfact.bench.scenarios import SCENARIOS, run_scenarios
+from pynfact.bench.sitegen import PROFILES
+
+
+# Subcommands of the benchmark suite, the first one is the default
+COMMANDS = ('run', 'micro', 'imports', 'markdown')
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments of the benchmark suite.
+
+    When no subcommand is given, ``run`` is assumed.
+
+    :param argv: Command line arguments, by default ``sys.argv``
+    :type argv: list
+    :return: Parsed arguments
+    :rtype: argparse.Namespace
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv.insert(0, COMMANDS[0])
+
+    parser = argparse.ArgumentParser(
+        prog='python -m pynfact.bench',
+        description="Benchmarks of the website generation")
+    subparsers = parser.add_subparsers(dest='command')
+
+    sub = subparsers.add_parser(
+        'run', help="end-to-end benchmarks on a synthetic website "
+                    "(default)")
+    sub.add_argument('--profile', choices=sorted(PROFILES),
+                     default='small',
+                     help="named site profile (default: small)")
+    sub.add_argument('--posts', type=int,
+                     help="number of posts, overrides the profile")
+    sub.add_argument('--rst-ratio', type=float, default=0.2,
+                     help="ratio of reStructuredText posts")
+    sub.add_argument('--tags', type=int, default=3,
+                     help="number of tags per post")
+    sub.add_argument('--code-blocks', type=int, default=1,
+                     help="number of code blocks per post")
+    sub.add_argument('--static-kb', type=int, default=0,
+                     help="kilobytes of extra static files")
+    sub.add_argument('--locale', default='C.UTF-8',
+                     help="locale of the website (default: C.UTF-8)")
+    sub.add_argument('--seed', type=int, default=0,
+                     help="seed of the site generator")
+    sub.add_argument('--scenario', action='append', choices=SCENARIOS,
+                     help="scenario to run (default: all of them)")
+    sub.add_argument('--repeat', type=int, default=3,
+                     help="number of runs of every scenario")
+    sub.add_argument('--workdir',
+                     help="directory where to generate the website")
+    sub.add_argument('-o', '--output', metavar='FILE',
+                     help="write the results to a JSON file")
+
+    sub = subparsers.add_parser(
+        'micro', help="micro-benchmarks of the most called helpers")
+    sub.add_argument('-k', '--filter', default='*', metavar='PATTERN',
+                     help="run only the benchmarks matching a pattern")
+    sub.add_argument('--min-time', type=float, default=0.2,
+                     help="minimum time of every run, in seconds")
+    sub.add_argument('--repeat', type=int, default=3,
+                     help="number of runs of every benchmark")
+    sub.add_argument('--thresholds', metavar='FILE',
+                     default=THRESHOLDS_FILE,
+                     help="regression thresholds file")
+    sub.add_argument('--update', action='store_true',
+                     help="update the thresholds with the results")
+    sub.add_argument('--margin', type=float, default=0.3,
+                     help="margin of the updated thresholds "
+                          "(default: 0.3)")
+    sub.add_argument('-o', '--output', metavar='FILE',
+                     help="write the results to a JSON file")
+
+    sub = subparsers.add_parser(
+        'imports', help="import time budgets of the command line")
+    sub.add_argument('-k', '--filter', default='*', metavar='PATTERN',
+                     help="check only the commands matching a pattern")
+    sub.add_argument('--repeat', type=int, default=5,
+                     help="number of runs of every command")
+    sub.add_argument('--scale', type=float, default=1.0,
+                     help="factor applied to every budget (default: 1.0)")
+    sub.add_argument('-o', '--output', metavar='FILE',
+                     help="write the results to a JSON file")
+
+    sub = subparsers.add_parser(
+        'markdown', help="compare the Markdown backends")
+    sub.add_argument('corpus', nargs='*',
+                     help="Markdown files or directories (default: the "
+                          "samples of a new website)")
+    sub.add_argument('--backend', action='append',
+                     help="backend to compare (default: all of them)")
+    sub.add_argument('--repeat', type=int, default=3,
+                     help="number of runs of every backend")
+    sub.add_argument('--encoding', default='utf-8',
+                     help="encoding of the files (default: utf-8)")
+    sub.add_argument('-v', '--verbose', action='store_true',
+                     help="show the differences of the HTML")
+    sub.add_argument('-o', '--output', metavar='FILE',
+                     help="write the results to a JSON file")
+
+    return parser.parse_args(argv)
+
+
+def dump(results, output=None):
+    """Write the results as JSON to a file or to the standard output.
+
+    :param results: Results to write
+    :type results: dict
+    :param output: Output file, by default the standard output
+    :type output: str
+    """
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+def main_run(args):
+    """Run the end-to-end benchmarks and report their results."""
+    posts = args.posts or PROFILES[args.profile]['posts']
+    results = run_scenarios(workdir=args.workdir, repeat=args.repeat,
+                            scenarios=tuple(args.scenario or SCENARIOS),
+                            posts=posts, rst_ratio=args.rst_ratio,
+                            tags_per_post=args.tags,
+                            code_blocks=args.code_blocks,
+                            static_kb=args.static_kb, locale=args.locale,
+                            seed=args.seed)
+
+    for scenario, summary in results.get('summary').items():
+        print("{:<5} {:8.3f} s  {:>8} KiB".format(
+            scenario, summary.get('wall'), summary.get('peak_rss_kb')),
+            file=sys.stderr)
+        for phase, elapsed in summary.get('phases').items():
+            print("      {:<16} {:8.3f} s".format(phase, elapsed),
+                  file=sys.stderr)
+
+    dump(results, args.output)
+
+
+def main_micro(args):
+    """Run the micro-benchmarks and check them against the thresholds.
+
+    :return: Exit status, ``1`` if there are regressions
+    :rtype: int
+    """
+    results = micro.run(args.filter, args.min_time, args.repeat)
+    thresholds = micro.load_thresholds(args.thresholds)
+
+    for name, result in results.items():
+        print("{:<40} {:>14.1f} ops/s {:>12} B".format(
+            name, result.get('ops'), result.get('alloc')), file=sys.stderr)
+    dump(results, args.output)
+
+    if args.update:
+        with open(args.thresholds, 'w', encoding='utf-8') as f:
+            json.dump(micro.make_thresholds(results, args.margin,
+                                            thresholds), f, indent=2)
+            f.write('\n')
+        return 0
+
+    if thresholds and not micro.same_machine(thresholds):
+        print("WARNING thresholds recorded on another machine ({}); "
+              "update them with --update".format(
+                  ', '.join('{}={}'.format(key, value) for key, value in
+                            thresholds.get('machine', {}).items())),
+              file=sys.stderr)
+    regressions = micro.check(results, thresholds)
+    for regression in regressions:
+        print("REGRESSION " + regression, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main_imports(args):
+    """Measure the import time of the commands and check their budgets.
+
+    :return: Exit status, ``1`` if any command is over its budget
+    :rtype: int
+    """
+    results = imports.run(args.filter, args.repeat, args.scale)
+
+    for name, result in results.items():
+        budget = result.get('budget_ms')
+        print("{:<10} {:>8.1f} ms {:>10}  {}".format(
+            name, result.get('import_ms'),
+            '/ {:.0f} ms'.format(budget) if budget is not None else '',
+            ', '.join(result.get('heavy'))), file=sys.stderr)
+    dump(results, args.output)
+
+    failures = imports.check(results)
+    for failure in failures:
+        print("OVER BUDGET " + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main_markdown(args):
+    """Compare the Markdown backends and report their differences."""
+    results = mdcompare.run(args.corpus, args.backend, args.repeat,
+                            args.encoding)
+    print(mdcompare.format_report(results, args.verbose), file=sys.stderr)
+    if args.output:
+        dump(results, args.output)
+    return 0
+
+
+def main(argv=None):
+    """Run the benchmarks selected in the command line."""
+    args = parse_args(argv)
+    if args.command == 'micro':
+        return main_micro(args)
+    if args.command == 'imports':
+        return main_imports(args)
+    if args.command == 'markdown':
+        return main_markdown(args)
+    return main_run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
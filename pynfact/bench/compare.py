@@ -0,0 +1,127 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Compare the results of a benchmark run against a stored baseline.
+
+The comparison is meant to be stable on shared machines, where the time
+of a single build can vary a lot.  Every scenario is run several times,
+and every measure (the wall time of the build and of every phase) is
+summarized by its median, and its noise by the median absolute
+deviation (MAD) of the runs.  A measure regresses only when its median
+exceeds the one of the baseline by more than the tolerance, plus the
+noise of both runs, plus a minimum absolute difference that ignores the
+phases that take almost no time::
+
+    current > baseline * (1 + tolerance) + noise * (mad_b + mad_c)
+    current - baseline > min_delta
+
+The peak resident set size is compared by its median, only with the
+tolerance, since it hardly depends on the load of the machine.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import statistics
+
+
+# Scale factor to make the MAD comparable to the standard deviation
+MAD_SCALE = 1.4826
+
+
+def median_mad(values):
+    """Compute the median and the median absolute deviation.
+
+    :param values: Measures
+    :type values: list
+    :return: Median and scaled median absolute deviation
+    :rtype: tuple
+    """
+    median = statistics.median(values)
+    mad = statistics.median(abs(value - median) for value in values)
+    return median, mad * MAD_SCALE
+
+
+def measures(runs):
+    """Collect every measure of the runs of a scenario.
+
+    :param runs: Results of every run, as in :func:`worker.build`
+    :type runs: list
+    :return: Measures by name, every one with the values of all runs
+    :rtype: dict
+    """
+    collected = {'wall': [run.get('wall') for run in runs]}
+    for run in runs:
+        for phase, elapsed in run.get('phases', {}).items():
+            collected.setdefault('phase:' + phase, []).append(elapsed)
+    return collected
+
+
+def compare(baseline, current, tolerance=0.1, noise=3.0, min_delta=0.005):
+    """Compare the results of a run against the baseline.
+
+    :param baseline: Baseline results, as in :func:`run_scenarios`
+    :type baseline: dict
+    :param current: Current results, as in :func:`run_scenarios`
+    :type current: dict
+    :param tolerance: Ratio allowed above the baseline
+    :type tolerance: float
+    :param noise: Number of MADs allowed above the baseline
+    :type noise: float
+    :param min_delta: Minimum difference in seconds to be a regression
+    :type min_delta: float
+    :return: Every compared measure, with a ``regression`` flag
+    :rtype: list
+    """
+    report = []
+    for scenario, base_runs in baseline.get('runs', {}).items():
+        cur_runs = current.get('runs', {}).get(scenario)
+        if not base_runs or not cur_runs:
+            continue
+
+        base_measures = measures(base_runs)
+        cur_measures = measures(cur_runs)
+        for name, base_values in base_measures.items():
+            if name not in cur_measures:
+                continue
+            base, base_mad = median_mad(base_values)
+            cur, cur_mad = median_mad(cur_measures.get(name))
+            limit = base * (1 + tolerance) + noise * (base_mad + cur_mad)
+            report.append({
+                'scenario': scenario, 'measure': name,
+                'baseline': base, 'current': cur, 'limit': limit,
+                'regression': cur > limit and cur - base > min_delta})
+
+        base_rss = [run.get('peak_rss_kb') for run in base_runs
+                    if run.get('peak_rss_kb') is not None]
+        cur_rss = [run.get('peak_rss_kb') for run in cur_runs
+                   if run.get('peak_rss_kb') is not None]
+        if base_rss and cur_rss:
+            base = statistics.median(base_rss)
+            cur = statistics.median(cur_rss)
+            report.append({
+                'scenario': scenario, 'measure': 'peak_rss_kb',
+                'baseline': base, 'current': cur,
+                'limit': base * (1 + tolerance),
+                'regression': cur > base * (1 + tolerance)})
+
+    return report
+
+
+def format_report(report):
+    """Make a human readable table of a comparison.
+
+    :param report: Comparison, as in :func:`compare`
+    :type report: list
+    :return: Table with a line per measure
+    :rtype: str
+    """
+    lines = ['{:<5} {:<24} {:>12} {:>12} {:>8}'.format(
+        'Scen.', 'Measure', 'Baseline', 'Current', 'Change')]
+    for item in report:
+        base, cur = item.get('baseline'), item.get('current')
+        change = (cur - base) / base * 100 if base else 0.0
+        lines.append('{:<5} {:<24} {:>12.4g} {:>12.4g} {:>+7.1f}%{}'.format(
+            item.get('scenario'), item.get('measure'), base, cur, change,
+            '  REGRESSION' if item.get('regression') else ''))
+    return '\n'.join(lines)
@@ -0,0 +1,135 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Import time budgets of the command line.
+
+Every command is run in a new interpreter with ``python -X importtime``,
+and the time spent importing modules is added up from its report.  A
+command fails its budget when it takes longer than allowed, or when it
+imports any of the heavy dependencies that only the build needs (such
+as Jinja2, Markdown or docutils), whatever the time it takes.
+
+The time depends on the machine, so the budgets can be scaled with
+``--scale`` on slow machines; the heavy modules check does not depend
+on the machine at all.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import fnmatch
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+# Top level packages that only the build needs
+HEAVY_MODULES = ('dateutil', 'docutils', 'feedgen', 'jinja2', 'lxml',
+                 'markdown', 'pygments', 'unidecode', 'yaml')
+
+# Arguments of the interpreter for every command, and its budget in
+# milliseconds of import time, ``None`` to report it without checking.
+# ``serve`` only imports what ``pynfact -s`` imports before listening.
+COMMANDS = {
+    'version': (['-m', 'pynfact', '--version'], 60),
+    'help': (['-m', 'pynfact', '--help'], 60),
+    'init': (['-m', 'pynfact', '-l', os.devnull, '-i', '{tmpdir}/site'],
+             60),
+    'serve': (['-c', 'import pynfact.main, pynfact.server'], 100),
+    'build': (['-c', 'import pynfact.main, pynfact.builder'], None),
+}
+
+
+def import_time(args, tmpdir):
+    """Run a command and measure the time spent importing modules.
+
+    :param args: Arguments of the interpreter
+    :type args: list
+    :param tmpdir: Directory where the command is run
+    :type tmpdir: str
+    :return: Import time in milliseconds, and top level packages
+    :rtype: tuple
+    """
+    # Import this same ``pynfact``, even if it is not installed
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.realpath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, (root, os.environ.get('PYTHONPATH')))))
+
+    args = [arg.format(tmpdir=tmpdir) for arg in args]
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + args,
+                          cwd=tmpdir, env=env, capture_output=True,
+                          text=True)
+
+    total, packages = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line.split('|')
+        try:
+            total += int(fields[0].split(':')[1])
+        except (IndexError, ValueError):  # Header line
+            continue
+        packages.add(fields[2].strip().split('.')[0])
+
+    return total / 1000, packages
+
+
+def run(pattern='*', repeat=5, scale=1.0):
+    """Measure the import time of the commands matching a pattern.
+
+    :param pattern: Pattern the command names must match
+    :type pattern: str
+    :param repeat: Number of runs of every command
+    :type repeat: int
+    :param scale: Factor applied to every budget
+    :type scale: float
+    :return: Import time (median), budget and heavy modules imported
+        of every command
+    :rtype: dict
+    """
+    results = dict()
+    for name, (args, budget) in COMMANDS.items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+
+        times, heavy = [], set()
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(prefix='pynfact-imports-') \
+                    as tmpdir:
+                elapsed, packages = import_time(args, tmpdir)
+            times.append(elapsed)
+            heavy |= packages.intersection(HEAVY_MODULES)
+
+        results[name] = {
+            'import_ms': statistics.median(times),
+            'budget_ms': budget * scale if budget is not None else None,
+            'heavy': sorted(heavy),
+        }
+
+    return results
+
+
+def check(results):
+    """Check the import times against their budgets.
+
+    :param results: Results, as in :func:`run`
+    :type results: dict
+    :return: Description of every command over its budget
+    :rtype: list
+    """
+    failures = []
+    for name, result in results.items():
+        budget = result.get('budget_ms')
+        if budget is None:
+            continue
+        if result.get('heavy'):
+            failures.append('{}: imports {}'.format(
+                name, ', '.join(result.get('heavy'))))
+        if result.get('import_ms') > budget:
+            failures.append('{}: {:.1f} ms > {:.1f} ms'.format(
+                name, result.get('import_ms'), budget))
+
+    return failures
@@ -0,0 +1,191 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Compare the Markdown backends, in speed and in the HTML they generate.
+
+Every Markdown document of a corpus (by default, the samples of a new
+website, in ``data/initnew``) is parsed with every installed backend,
+as in :mod:`pynfact.parsers.mdbackends`.  For every backend, the
+report shows the time needed to parse the whole corpus (the best of
+several runs), and the documents whose metadata or HTML differ from
+the ones of the default backend, Python-Markdown.
+
+The HTML is compared after collapsing the white space, and the white
+space between tags, since it's not shown by the browsers.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import difflib
+import os
+import re
+import time
+
+from pynfact.fileman import has_extension_md
+from pynfact.parsers.mdbackends import BACKENDS, DEFAULT_BACKEND
+
+
+# Samples of a new website
+SAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    'data', 'initnew')
+
+
+def find_documents(paths):
+    """Find the Markdown documents of a corpus.
+
+    :param paths: Files and directories, walked recursively
+    :type paths: list
+    :return: Markdown files, in alphabetical order
+    :rtype: list
+    """
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                documents.extend(os.path.join(root, name) for name in files
+                                 if has_extension_md(name))
+        elif has_extension_md(path):
+            documents.append(path)
+
+    return sorted(documents)
+
+
+def normalize_html(html):
+    """Normalize the white space of some HTML, to compare it.
+
+    :param html: HTML code
+    :type html: str
+    :return: HTML with a tag per line, and no redundant white space
+    :rtype: str
+    """
+    html = re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', html.strip()))
+    return html.replace('><', '>\n<')
+
+
+def parse_all(documents, backend, encoding='utf-8'):
+    """Parse all the documents with a backend.
+
+    :param documents: Markdown files
+    :type documents: list
+    :param backend: Backend name
+    :type backend: str
+    :param encoding: Encoding of the files
+    :type encoding: str
+    :return: Metadata and HTML of every document
+    :rtype: dict
+    """
+    from pynfact.parsers import ParserMd
+
+    parsed = dict()
+    for document in documents:
+        parser = ParserMd(document, encoding, backend=backend)
+        parsed[document] = (parser.metadata(), parser.html())
+    return parsed
+
+
+def available_backends(names=None):
+    """Get the backends that can be used, the default one first.
+
+    :param names: Backends to compare, by default all of them
+    :type names: list
+    :return: Names of the installed backends, and of the missing ones
+    :rtype: tuple
+    """
+    from pynfact.parsers.mdbackends import markdown_backend
+
+    available, missing = [DEFAULT_BACKEND], []
+    for name in names or BACKENDS:
+        if name == DEFAULT_BACKEND or name in available:
+            continue
+        try:
+            markdown_backend(name)
+        except (KeyError, ImportError):
+            missing.append(name)
+        else:
+            available.append(name)
+
+    return available, missing
+
+
+def run(paths=None, backends=None, repeat=3, encoding='utf-8'):
+    """Compare the backends on a corpus.
+
+    :param paths: Files and directories of the corpus, by default the
+        samples of a new website
+    :type paths: list
+    :param backends: Backends to compare, by default all of them
+    :type backends: list
+    :param repeat: Number of runs, taking the best of them
+    :type repeat: int
+    :param encoding: Encoding of the files
+    :type encoding: str
+    :return: Number of documents, missing backends, and the time and
+        the differing documents of every backend
+    :rtype: dict
+    """
+    documents = find_documents(paths or [SAMPLES_DIR])
+    available, missing = available_backends(backends)
+
+    results = {'documents': len(documents), 'missing': missing,
+               'backends': dict()}
+    reference = None
+    for backend in available:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parsed = parse_all(documents, backend, encoding)
+            times.append(time.perf_counter() - start)
+        reference = reference or parsed
+
+        differences = dict()
+        for document, (meta, html) in parsed.items():
+            ref_meta, ref_html = reference.get(document)
+            diff = list(difflib.unified_diff(
+                normalize_html(ref_html).splitlines(),
+                normalize_html(html).splitlines(),
+                DEFAULT_BACKEND, backend, lineterm='', n=1))
+            if diff or meta != ref_meta:
+                differences[document] = {'meta': meta != ref_meta,
+                                         'diff': diff}
+
+        results['backends'][backend] = {'time': min(times),
+                                        'differences': differences}
+
+    return results
+
+
+def format_report(results, verbose=False):
+    """Make a human readable report of a comparison.
+
+    :param results: Comparison, as in :func:`run`
+    :type results: dict
+    :param verbose: Show the differences of the HTML
+    :type verbose: bool
+    :return: Table with a line per backend
+    :rtype: str
+    """
+    backends = results.get('backends')
+    reference = backends.get(DEFAULT_BACKEND).get('time')
+    lines = ['{:<16} {:>10} {:>8} {:>10}'.format(
+        'Backend', 'Time (s)', 'Speedup', 'Different')]
+    for name, result in backends.items():
+        lines.append('{:<16} {:>10.3f} {:>7.2f}x {:>4} / {:<4}'.format(
+            name, result.get('time'),
+            reference / result.get('time') if result.get('time') else 0,
+            len(result.get('differences')), results.get('documents')))
+
+    for name in results.get('missing'):
+        lines.append('{:<16} {:>10}'.format(name, 'missing'))
+
+    if verbose:
+        for name, result in backends.items():
+            for document, difference in result.get('differences').items():
+                lines.append('')
+                lines.append('{}: {}{}'.format(
+                    name, document,
+                    ' (metadata differs)' if difference.get('meta') else ''))
+                lines.extend(difference.get('diff'))
+
+    return '\n'.join(lines)
@@ -0,0 +1,342 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Micro-benchmarks of the helpers called many times per build.
+
+Every benchmark reports its throughput (operations per second, the best
+of several runs measured with :mod:`timeit`) and the peak memory
+allocated by a single call (measured with :mod:`tracemalloc`).
+
+The throughput depends on the machine, and on its load, so it's not
+compared as is, but relative to the throughput of a ``calibration``
+benchmark (plain Python code, independent of PynFact) run in the same
+process.  The results are checked against a thresholds file, by default
+``thresholds.json`` next to this module, with the minimum ratio to the
+calibration, and the machine where they were recorded::
+
+    {"machine": {"machine": "x86_64", "python": "CPython 3.11", ...},
+     "benchmarks": {"struri.slugify": {"min_ratio": 12.5,
+                                       "max_alloc": 2048}, ...}}
+
+The ratios are checked on any machine, but they still depend somewhat
+on the processor and on the version of Python, so a warning is shown if
+the thresholds were recorded on another machine, and they should be
+updated with ``--update`` on the machine where the benchmarks are run
+before they are used to look for small regressions.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import fnmatch
+import functools
+import json
+import os
+import platform
+import random
+import tempfile
+import timeit
+import tracemalloc
+
+from pynfact.bench.sitegen import md_post, paragraph, rst_post
+
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                               'thresholds.json')
+
+# Name of the benchmark every throughput is relative to
+CALIBRATION = 'calibration'
+
+# Number of paragraphs and code blocks of every document size
+DOCUMENT_SIZES = {
+    'small': (3, 0),
+    'medium': (20, 2),
+    'huge': (400, 20),
+}
+
+
+def make_document(size, markup, seed=0):
+    """Make the text of a document to parse.
+
+    :param size: Document size, one of :data:`DOCUMENT_SIZES`
+    :type size: str
+    :param markup: Markup language, ``md`` or ``rst``
+    :type markup: str
+    :param seed: Seed of the random generator
+    :type seed: int
+    :return: Text of the document
+    :rtype: str
+    """
+    rnd = random.Random(seed)
+    paragraphs, code_blocks = DOCUMENT_SIZES[size]
+    post = {'title': 'A {} document'.format(size),
+            'summary': 'Summary of the *{}* document'.format(size),
+            'category': 'Benchmarks', 'tags': 'one, two, three',
+            'date': '2025-03-10 12:30',
+            'paragraphs': [paragraph(rnd) for _ in range(paragraphs)],
+            'code_blocks': code_blocks}
+    return md_post(post) if markup == 'md' else rst_post(post)
+
+
+def make_page(body):
+    """Make an HTML page, as the templates render it, around a body.
+
+    :param body: HTML of the content of the page
+    :type body: str
+    :return: HTML page
+    :rtype: str
+    """
+    nav = ''.join('            <li><a href="/{0}/"\n'
+                  '                   title="{0}">{0}</a></li>\n'.format(
+                      'section-{}'.format(n)) for n in range(10))
+    return ('<!DOCTYPE html>\n<html lang="en">\n  <head>\n'
+            '    <meta charset="utf-8">\n    <title>A page</title>\n'
+            '  </head>\n  <body>\n    <!-- Navigation -->\n'
+            '    <nav>\n        <ul>\n' + nav + '        </ul>\n'
+            '    </nav>\n\n    <!-- Content -->\n    <article>\n' +
+            '\n'.join('        ' + line for line in body.splitlines()) +
+            '\n    </article>\n  </body>\n</html>\n')
+
+
+def calibration():
+    """Run the reference workload of the benchmarks.
+
+    It's plain Python code, with the kind of operations of the helpers
+    (loops, strings, sorting), and it never changes.
+
+    :return: A string of sorted numbers
+    :rtype: str
+    """
+    return ','.join(sorted(str(n * 7919 % 1000) for n in range(500)))
+
+
+def machine_info():
+    """Describe the machine where the benchmarks run.
+
+    :return: Architecture, processor, number of CPUs, and Python
+        implementation and version
+    :rtype: dict
+    """
+    return {'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+            'python': '{} {}.{}'.format(platform.python_implementation(),
+                                        *platform.python_version_tuple())}
+
+
+def cold_cache(func):
+    """Make a callable run with an empty highlight cache, every time.
+
+    The parsers highlight the code blocks through a cache shared by the
+    whole process, so, from the second call on, they would only measure
+    the lookups in the cache, instead of the highlighting.
+
+    :param func: Callable without arguments
+    :type func: callable
+    :return: Callable without arguments
+    :rtype: callable
+    """
+    from pynfact.highlight import HIGHLIGHT_CACHE
+
+    def call():
+        HIGHLIGHT_CACHE.clear()
+        return func()
+    return call
+
+
+def benchmarks(tmpdir):
+    """Get the benchmarks, as callables without arguments.
+
+    :param tmpdir: Directory where to write the documents to parse
+    :type tmpdir: str
+    :return: Dictionary of benchmark names and callables
+    :rtype: dict
+    """
+    from pynfact.fileman import has_extension_md_rst, link_to
+    from pynfact.highlight import HIGHLIGHT_CACHE
+    from pynfact.htmlmin import minify_html
+    from pynfact.meta import Meta, inline_markdown
+    from pynfact.parsers import ParserMd, ParserRst
+    from pynfact.struri import date_iso, slugify, strip_html_tags
+
+    title = 'Ünïcödé title: <em>with</em> symbols & “quotes”, 2025!'
+    html = '<p>A <a href="x.html">link</a> and <code>code</code></p>' * 10
+    meta = Meta({'title': ['A <em>title</em>'], 'author': ['Author'],
+                 'category': ['Benchmarks'], 'tags': ['one, two, three'],
+                 'date': ['2025-03-10 12:30'],
+                 'updated': ['2025-03-19 08:00']}, 'meta.md')
+    odate = meta.odate_info()
+    defaults = {'author': 'Anonymous', 'category': 'Miscellaneous',
+                'language': 'en'}
+
+    benches = {
+        'struri.slugify': lambda: slugify(title),
+        'struri.strip_html_tags': lambda: strip_html_tags(html),
+        'struri.date_iso': lambda: date_iso(odate),
+        'fileman.link_to': lambda: link_to(title, 'posts',
+                                           makedirs=False),
+        'fileman.has_extension_md_rst':
+            lambda: has_extension_md_rst('posts/entry.markdown'),
+        'meta.Meta.as_dict': lambda: meta.as_dict(defaults=defaults),
+        'meta.Meta._parse_date_obj':
+            lambda: meta._parse_date_obj({'odate', 'date', 'created'}),
+        'meta.inline_markdown': lambda: (inline_markdown.cache_clear(),
+                                         inline_markdown(title)),
+    }
+
+    for markup, parser_class in (('md', ParserMd), ('rst', ParserRst)):
+        for size in DOCUMENT_SIZES:
+            filename = os.path.join(tmpdir, '{}.{}'.format(size, markup))
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(make_document(size, markup))
+            parser = parser_class(filename)
+            name = 'parsers.{}.{}'.format(parser_class.__name__, '{}')
+            benches[name.format('html:' + size)] = cold_cache(parser.html)
+            benches[name.format('html+cache:' + size)] = parser.html
+            benches[name.format('metadata:' + size)] = \
+                cold_cache(parser.metadata)
+
+            # A page as the templates render it: indented, and commented
+            if markup == 'md':
+                page = make_page(parser.html())
+                benches['htmlmin.minify_html:' + size] = \
+                    functools.partial(minify_html, page)
+
+    # Never read nor write the highlighted code of the benchmarks on disk
+    HIGHLIGHT_CACHE.configure(None)
+
+    return benches
+
+
+def measure(func, min_time=0.2, repeat=3):
+    """Measure the throughput and the allocations of a callable.
+
+    :param func: Callable without arguments
+    :type func: callable
+    :param min_time: Minimum time of every run, in seconds
+    :type min_time: float
+    :param repeat: Number of runs, taking the best of them
+    :type repeat: int
+    :return: Operations per second and peak bytes allocated per call
+    :rtype: dict
+    """
+    func()  # Warm up caches and lazy imports
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    best = min([elapsed] + timer.repeat(repeat - 1, number))
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'ops': number / best, 'alloc': peak}
+
+
+def run(pattern='*', min_time=0.2, repeat=3):
+    """Run the micro-benchmarks.
+
+    :param pattern: Shell-style pattern of the benchmarks to run
+    :type pattern: str
+    :param min_time: Minimum time of every run, in seconds
+    :type min_time: float
+    :param repeat: Number of runs of every benchmark
+    :type repeat: int
+    :return: Results by benchmark name, always including the
+        calibration
+    :rtype: dict
+    """
+    results = {CALIBRATION: measure(calibration, min_time, repeat)}
+    with tempfile.TemporaryDirectory(prefix='pynfact-micro-') as tmpdir:
+        results.update((name, measure(func, min_time, repeat))
+                       for name, func in benchmarks(tmpdir).items()
+                       if fnmatch.fnmatchcase(name, pattern))
+    return results
+
+
+def load_thresholds(filename=THRESHOLDS_FILE):
+    """Load the regression thresholds.
+
+    :param filename: Thresholds file
+    :type filename: str
+    :return: Thresholds by benchmark name, empty if there is no file
+    :rtype: dict
+    """
+    try:
+        with open(filename, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict()
+
+
+def make_thresholds(results, margin=0.3, thresholds=None):
+    """Make regression thresholds from the results of a run.
+
+    :param results: Results, as in :func:`run`
+    :type results: dict
+    :param margin: Ratio allowed below the measured throughput, and
+        above the measured allocations
+    :type margin: float
+    :param thresholds: Previous thresholds to update
+    :type thresholds: dict
+    :return: Thresholds, with the machine where they were recorded
+    :rtype: dict
+    """
+    base = results.get(CALIBRATION).get('ops')
+    benchmarks = dict((thresholds or {}).get('benchmarks', {}))
+    for name, result in results.items():
+        if name == CALIBRATION:
+            continue
+        benchmarks[name] = {
+            'min_ratio': round(result.get('ops') / base * (1 - margin), 6),
+            'max_alloc': int(result.get('alloc') * (1 + margin)),
+        }
+    return {'machine': machine_info(),
+            'benchmarks': dict(sorted(benchmarks.items()))}
+
+
+def same_machine(thresholds):
+    """Check if some thresholds were recorded on this machine.
+
+    :param thresholds: Thresholds, as in :func:`make_thresholds`
+    :type thresholds: dict
+    :return: ``True`` if they were recorded on this machine
+    :rtype: bool
+    """
+    return bool(thresholds) and thresholds.get('machine') == machine_info()
+
+
+def check(results, thresholds):
+    """Check the results of a run against the thresholds.
+
+    The throughput is compared relative to the calibration, so the
+    thresholds recorded on any machine can be checked.
+
+    :param results: Results, as in :func:`run`
+    :type results: dict
+    :param thresholds: Thresholds, as in :func:`make_thresholds`
+    :type thresholds: dict
+    :return: Descriptions of the regressions found
+    :rtype: list
+    """
+    base = results.get(CALIBRATION).get('ops')
+    regressions = []
+    for name, result in results.items():
+        threshold = (thresholds or {}).get('benchmarks', {}).get(name)
+        if not threshold:
+            continue
+        ratio = result.get('ops') / base
+        if ratio < threshold.get('min_ratio', 0):
+            regressions.append(
+                '{}: {:.4f} < {:.4f} times the calibration'.format(
+                    name, ratio, threshold.get('min_ratio')))
+        if threshold.get('max_alloc') is not None and \
+                result.get('alloc') > threshold.get('max_alloc'):
+            regressions.append('{}: {} B allocated > {} B'.format(
+                name, result.get('alloc'), threshold.get('max_alloc')))
+    return regressions
@@ -0,0 +1,143 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+End-to-end benchmark scenarios of the website generation.
+
+There are three scenarios, all of them run on a synthetic website:
+
+* ``cold``: build from scratch, without a deploy directory;
+* ``warm``: build again, when nothing has changed;
+* ``edit``: build again, after editing a single post.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import pynfact
+from pynfact.bench.sitegen import edit_post, generate_site
+
+
+SCENARIOS = ('cold', 'warm', 'edit')
+
+
+def run_build(site):
+    """Build a website in a new process, and get its measures.
+
+    :param site: Directory of the website
+    :type site: str
+    :return: Measures, as in :func:`pynfact.bench.worker.build`
+    :rtype: dict
+    :raise RuntimeError: If the build fails
+    """
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(pynfact.__file__))
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [package_root, env.get('PYTHONPATH')]))
+    proc = subprocess.run([sys.executable, '-W', 'ignore',
+                           '-m', 'pynfact.bench.worker', site],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          env=env, universal_newlines=True)
+    try:
+        return json.loads(proc.stdout)
+    except ValueError:
+        raise RuntimeError('Build failed:\n' + proc.stderr)
+
+
+def run_scenarios(workdir=None, repeat=3, scenarios=SCENARIOS,
+                  **site_params):
+    """Run the benchmark scenarios on a synthetic website.
+
+    :param workdir: Directory where to generate the website, by default
+        a temporary directory removed at the end
+    :type workdir: str
+    :param repeat: Number of runs of every scenario
+    :type repeat: int
+    :param scenarios: Scenarios to run
+    :type scenarios: iterable
+    :param site_params: Parameters of :func:`generate_site`
+    :return: Parameters, environment, and results of every run
+    :rtype: dict
+    """
+    tmpdir = None if workdir else tempfile.mkdtemp(prefix='pynfact-bench-')
+    site = os.path.join(workdir or tmpdir, 'site')
+    try:
+        if os.path.exists(site):
+            shutil.rmtree(site)
+        params = generate_site(site, **site_params)
+        deploy = os.path.join(site, '_build')
+
+        runs = {scenario: [] for scenario in scenarios}
+        for i in range(repeat):
+            if 'cold' in scenarios:
+                shutil.rmtree(deploy, ignore_errors=True)
+                runs['cold'].append(run_build(site))
+            elif not os.path.exists(deploy):
+                run_build(site)
+            if 'warm' in scenarios:
+                runs['warm'].append(run_build(site))
+            if 'edit' in scenarios:
+                edit_post(site, stamp=i)
+                runs['edit'].append(run_build(site))
+    finally:
+        tmpdir and shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return {'pynfact': pynfact_version(), 'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(), 'params': params,
+            'repeat': repeat, 'runs': runs,
+            'summary': {scenario: summarize(results)
+                        for scenario, results in runs.items()}}
+
+
+def summarize(results):
+    """Summarize the runs of a scenario by their medians.
+
+    :param results: Measures of every run of the scenario
+    :type results: list
+    :return: Median wall time, of every phase, and of the peak RSS
+    :rtype: dict
+    """
+    if not results:
+        return dict()
+    phases = results[0].get('phases').keys()
+    rss = [run.get('peak_rss_kb') for run in results
+           if run.get('peak_rss_kb') is not None]
+    return {
+        'wall': statistics.median(run.get('wall') for run in results),
+        'phases': {phase: statistics.median(
+            run.get('phases').get(phase, 0) for run in results)
+            for phase in phases},
+        'peak_rss_kb': statistics.median(rss) if rss else None,
+    }
+
+
+def pynfact_version():
+    """Get the version of the program being measured."""
+    from pynfact.main import __version__
+    return __version__
+
+
+def git_commit():
+    """Get the current commit, if running from a git repository.
+
+    :return: Commit hash, or ``None`` if unknown
+    :rtype: str
+    """
+    try:
+        proc = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              cwd=os.path.dirname(pynfact.__file__),
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              universal_newlines=True)
+    except OSError:
+        return None
+    return proc.stdout.strip() or None
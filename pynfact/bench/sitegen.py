@@ -0,0 +1,211 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Synthetic website generator for benchmarks.
+
+The generated websites are deterministic: the same parameters always
+produce the same files, so the results are comparable across versions.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import os
+import random
+import shutil
+from datetime import datetime, timedelta
+
+
+# Named site profiles: number of posts and other parameters
+PROFILES = {
+    'small': {'posts': 100},
+    'medium': {'posts': 1000},
+    'large': {'posts': 10000},
+    'huge': {'posts': 50000},
+}
+
+# Words used to make the text of the posts
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do '
+         'eiusmod tempor incididunt ut labore et dolore magna aliqua enim '
+         'ad minim veniam quis nostrud exercitation ullamco laboris nisi '
+         'aliquip ex ea commodo consequat duis aute irure in reprehenderit '
+         'voluptate velit esse cillum fugiat nulla pariatur').split()
+
+# Code sample repeated in the code blocks
+CODE = '''def fibonacci(n):
+    """Return the n-th Fibonacci number."""
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+if __name__ == '__main__':
+    print([fibonacci(n) for n in range({n})])'''
+
+
+def generate_site(path, posts=100, rst_ratio=0.2, tags_per_post=3,
+                  code_blocks=1, static_kb=0, locale='C.UTF-8', seed=0):
+    """Generate a synthetic website.
+
+    The templates, style sheets, pages and configuration are taken from
+    the skeleton used by ``pynfact --init``; the posts and the extra
+    static files are generated.
+
+    :param path: Directory where to create the website
+    :type path: str
+    :param posts: Number of posts
+    :type posts: int
+    :param rst_ratio: Ratio of reStructuredText posts, from 0 to 1
+    :type rst_ratio: float
+    :param tags_per_post: Number of tags in every post
+    :type tags_per_post: int
+    :param code_blocks: Number of code blocks in every post
+    :type code_blocks: int
+    :param static_kb: Kilobytes of extra static files
+    :type static_kb: int
+    :param locale: Locale of the website
+    :type locale: str
+    :param seed: Seed of the random generator
+    :type seed: int
+    :return: Parameters used to generate the website
+    :rtype: dict
+    """
+    params = {'posts': posts, 'rst_ratio': rst_ratio,
+              'tags_per_post': tags_per_post, 'code_blocks': code_blocks,
+              'static_kb': static_kb, 'locale': locale, 'seed': seed}
+    rnd = random.Random(seed)
+    skeleton = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.realpath(__file__))), 'data', 'initnew')
+
+    shutil.copytree(skeleton, path,
+                    ignore=shutil.ignore_patterns('posts', 'config.yml'))
+    os.makedirs(os.path.join(path, 'posts'))
+    with open(os.path.join(skeleton, 'config.yml'), encoding='utf-8') as f:
+        config = f.read().replace('en_US.UTF-8', locale)
+    with open(os.path.join(path, 'config.yml'), 'w', encoding='utf-8') as f:
+        f.write(config)
+
+    categories = ['Category {}'.format(i) for i in range(10)]
+    tags = ['tag{}'.format(i) for i in range(max(10, posts // 5))]
+    first_date = datetime(2010, 1, 1, 9, 0)
+    for i in range(posts):
+        post = {
+            'title': 'Post {:05d} {}'.format(i, ' '.join(
+                rnd.choice(WORDS) for _ in range(4)).capitalize()),
+            'summary': ' '.join(rnd.choice(WORDS) for _ in range(12)),
+            'category': rnd.choice(categories),
+            'tags': ', '.join(rnd.sample(tags, min(tags_per_post,
+                                                   len(tags)))),
+            'date': (first_date + timedelta(hours=13 * i)).strftime(
+                '%Y-%m-%d %H:%M'),
+            'paragraphs': [paragraph(rnd) for _ in range(rnd.randint(3, 8))],
+            'code_blocks': code_blocks,
+        }
+        if rnd.random() < rst_ratio:
+            filename, text = 'post{:05d}.rst'.format(i), rst_post(post)
+        else:
+            filename, text = 'post{:05d}.md'.format(i), md_post(post)
+        with open(os.path.join(path, 'posts', filename), 'w',
+                  encoding='utf-8') as f:
+            f.write(text)
+
+    if static_kb:
+        assets = os.path.join(path, 'static', 'assets')
+        os.makedirs(assets)
+        for i in range(max(1, static_kb // 64)):
+            with open(os.path.join(assets, 'asset{:04d}.bin'.format(i)),
+                      'wb') as f:
+                f.write(rnd.randbytes(min(64, static_kb) * 1024)
+                        if hasattr(rnd, 'randbytes')
+                        else os.urandom(min(64, static_kb) * 1024))
+
+    return params
+
+
+def paragraph(rnd):
+    """Make a paragraph of random words.
+
+    :param rnd: Random generator
+    :type rnd: random.Random
+    :return: Paragraph
+    :rtype: str
+    """
+    words = [rnd.choice(WORDS) for _ in range(rnd.randint(40, 120))]
+    words[0] = words[0].capitalize()
+    return ' '.join(words) + '.'
+
+
+def md_post(post):
+    """Make the text of a Markdown post.
+
+    :param post: Title, summary, category, tags, date, paragraphs and
+        number of code blocks of the post
+    :type post: dict
+    :return: Text of the post
+    :rtype: str
+    """
+    lines = ['Title: {}'.format(post['title']),
+             'Summary: {}'.format(post['summary']),
+             'Category: {}'.format(post['category']),
+             'Tags: {}'.format(post['tags']),
+             'Date: {}'.format(post['date']),
+             '', '']
+    for i, text in enumerate(post['paragraphs']):
+        lines.extend([text, ''])
+        if i < post['code_blocks']:
+            lines.extend(['```python', CODE.format(n=i + 10), '```', ''])
+    for i in range(len(post['paragraphs']), post['code_blocks']):
+        lines.extend(['```python', CODE.format(n=i + 10), '```', ''])
+
+    return '\n'.join(lines)
+
+
+def rst_post(post):
+    """Make the text of a reStructuredText post.
+
+    :param post: Title, summary, category, tags, date, paragraphs and
+        number of code blocks of the post
+    :type post: dict
+    :return: Text of the post
+    :rtype: str
+    """
+    lines = [post['title'], '=' * len(post['title']), '',
+             ':Subtitle: {}'.format(post['summary']),
+             ':Category: {}'.format(post['category']),
+             ':Tags: {}'.format(post['tags']),
+             ':Created: {}'.format(post['date']),
+             '', '']
+    code = ['.. code:: python', '']
+
+    for i, text in enumerate(post['paragraphs']):
+        lines.extend([text, ''])
+        if i < post['code_blocks']:
+            lines.extend(code + ['    ' + line if line else ''
+                                 for line in CODE.format(
+                                     n=i + 10).splitlines()] + [''])
+    for i in range(len(post['paragraphs']), post['code_blocks']):
+        lines.extend(code + ['    ' + line if line else ''
+                             for line in CODE.format(
+                                 n=i + 10).splitlines()] + [''])
+
+    return '\n'.join(lines)
+
+
+def edit_post(path, stamp=0):
+    """Edit the first post of a synthetic website.
+
+    A new paragraph is appended, so the content of the post changes.
+
+    :param path: Directory of the website
+    :type path: str
+    :param stamp: Number to make every edit different from the others
+    :type stamp: int
+    :return: Edited file
+    :rtype: str
+    """
+    posts_dir = os.path.join(path, 'posts')
+    filename = os.path.join(posts_dir, sorted(os.listdir(posts_dir))[0])
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write('\nEdited paragraph number {}.\n'.format(stamp))
+    return filename
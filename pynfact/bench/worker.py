@@ -0,0 +1,69 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=0 nowrap:
+"""
+Build a website measuring every phase, in a process of its own.
+
+Every build is run in a new process, so the peak resident set size is
+that of a single build.  The result is written to the standard output
+as a JSON object::
+
+    {"wall": 1.23, "phases": {"gather": 0.4, ...}, "counters": {...},
+     "peak_rss_kb": 81920}
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+
+def peak_rss_kb():
+    """Get the maximum resident set size of this process.
+
+    :return: Peak RSS in kilobytes, or ``None`` if unsupported
+    :rtype: int
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # On macOS the result is in bytes, in kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def build(site, config_file='config.yml'):
+    """Build a website measuring every phase.
+
+    :param site: Directory of the website
+    :type site: str
+    :param config_file: YAML configuration filename
+    :type config_file: str
+    :return: Wall time of the build and of every phase, counters of the
+        build, and peak RSS
+    :rtype: dict
+    """
+    os.chdir(site)
+    start = time.perf_counter()
+
+    from pynfact.cli import new_builder
+    from pynfact.stats import BuildStats
+
+    stats = BuildStats()
+    # Keep the standard output clean for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        new_builder(None, config_file, stats=stats).gen_site()
+
+    return {'wall': time.perf_counter() - start,
+            'phases': {name: phase.get('wall')
+                       for name, phase in stats.phases.items()},
+            'counters': stats.counters, 'peak_rss_kb': peak_rss_kb()}
+
+
+if __name__ == '__main__':
+    json.dump(build(*sys.argv[1:]), sys.stdout)
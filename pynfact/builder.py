@@ -24,24 +24,38 @@ Build the content.
     ``distutils`` compatibility packages.
 """
 import filecmp
+import functools
 import gettext
+import hashlib
 import locale
 import os
 import resource
 import shutil
 import sys
-from feedgen.feed import FeedGenerator
+from datetime import datetime
+from dateutil import tz
 from jinja2 import Environment, FileSystemLoader
 from math import ceil
 from pathlib import Path
 
-from pynfact.fileman import has_extension_md_rst, link_to
+from pynfact.assets import AssetPipeline
+from pynfact.cache import ContentCache, HtmlSpool, RenderFingerprints
+from pynfact.feeds import StreamFeedWriter, latest_entries, parse_feed_date
+from pynfact.fileman import link_to, replace_if_changed, scan_sources
+from pynfact.fragments import FragmentCacheExtension
+from pynfact.highlight import HIGHLIGHT_CACHE
+from pynfact.htmlmin import minify_html
+from pynfact.images import ImagePipeline
 from pynfact.meta import Meta
 from pynfact.parser import Parser
+from pynfact.parsers.mdbackends import DEFAULT_BACKEND, markdown_backend
+from pynfact.stats import BuildStats
 from pynfact.struri import slugify, strip_html_tags
+from pynfact.trace import NULL_TRACER
+from pynfact.writer import WritePipeline
 
 
-def copy_tree_update(src, dst, update=True, verbose=True):
+def copy_tree_update(src, dst, update=True, verbose=True, logger=None):
     """Recursively copy files and directories from source to
     destination, with optional update and verbosity.
 
@@ -54,6 +68,9 @@ def copy_tree_update(src, dst, update=True, verbose=True):
     :type update: bool, optional
     :param verbose: If True, print information about each copied file
     :type verbose: bool, optional
+    :param logger: Logger where to write that information, as debug
+        messages, instead of printing it
+    :type logger: logging.Logger
 
     The function copies the entire directory tree from ``src`` to
     ``dst``. If ``update`` is True, files in the destination will only
@@ -61,13 +78,23 @@ def copy_tree_update(src, dst, update=True, verbose=True):
     metadata and creates any necessary parent directories. If
     ``verbose`` is True, it prints a message each time a file is copied.
 
+    :return: Number of files copied, of files skipped because they
+        were unchanged, and of bytes copied
+    :rtype: tuple
     :raises Exception: Propagates exceptions from file comparison or
                        copying operations if they occur
+
+    .. versionchanged:: 1.4.0
+        Return the number of copied and unchanged files.
+
+    .. versionchanged:: 1.4.0
+        Add the ``logger`` argument.
     """
+    copied = unchanged = copied_bytes = 0
     src = Path(src)
     dst = Path(dst)
     if not src.exists():
-        return
+        return copied, unchanged, copied_bytes
     dst.mkdir(parents=True, exist_ok=True)
 
     for item in src.rglob('*'):
@@ -86,13 +113,62 @@ def copy_tree_update(src, dst, update=True, verbose=True):
                 same = False
             if same:
                 copy = False
+                unchanged += 1
         if copy:
             target.parent.mkdir(parents=True, exist_ok=True)
             # Preserve metadata; overwrite existing file
             shutil.copy2(item, target)
-            if verbose:
+            copied += 1
+            copied_bytes += target.stat().st_size
+            if verbose and logger:
+                logger.debug(f'copied: {item} -> {target}')
+            elif verbose:
                 print(f'copied: {item} -> {target}')
 
+    return copied, unchanged, copied_bytes
+
+
+class _Environment(Environment):
+    """Jinja2 environment that counts the compiled templates."""
+
+    templates_compiled = 0
+
+    def compile(self, *args, **kwargs):
+        """Compile a template, counting it."""
+        self.templates_compiled += 1
+        return super().compile(*args, **kwargs)
+
+
+@functools.lru_cache(maxsize=8)
+def jinja_environment(templates_dirs, locale_dir, current_locale):
+    """Create the Jinja2 environment used to render the templates.
+
+    The environment is created only once for every combination of
+    arguments, so the templates are compiled once and kept in memory
+    (Jinja2 reloads them automatically if they change on disk).  The
+    ``{% cache %}`` tag of :mod:`pynfact.fragments` is available in
+    every template.
+
+    :param templates_dirs: Absolute paths where to look for templates
+    :type templates_dirs: tuple
+    :param locale_dir: Directory where the translations are stored
+    :type locale_dir: str
+    :param current_locale: Locale of the generated website
+    :type current_locale: str
+    :return: Jinja2 environment ready to render templates
+    :rtype: jinja2.Environment
+
+    .. versionadded:: 1.4.0
+    """
+    trans = gettext.translation('default', locale_dir, [current_locale])
+    env = _Environment(extensions=['jinja2.ext.i18n',
+                                   FragmentCacheExtension],
+                       loader=FileSystemLoader(list(templates_dirs)))
+    env.install_gettext_translations(trans)
+    env.globals['slugify'] = slugify  # Add `slugify` to Jinja2
+    env.globals['strip_html_tags'] = strip_html_tags
+    return env
+
 
 class Builder:
     """Site building process manager.
@@ -134,9 +210,19 @@ class Builder:
         Removed use of the deprecated ``distutils`` package (no longer
         part of the ``stdlib`` on Python 3.12).  The code now uses
         :func:`copy_tree_update`.
+
+    .. versionchanged:: 1.4.0
+        Source files are parsed once per build through a
+        :class:`ContentCache`, and the Jinja2 environment is created
+        once instead of once per rendered page.
+
+    .. versionchanged:: 1.4.0
+        Every phase of the build is measured in a :class:`BuildStats`,
+        and optionally traced span by span with a :class:`Tracer`.
     """
 
-    def __init__(self, site_config, template_values=dict(), logger=None):
+    def __init__(self, site_config, template_values=dict(), logger=None,
+                 cache=None, stats=None, tracer=None):
         """Constructor.
 
         :param config: Site configuration as multidimensional dictionary
@@ -145,17 +231,37 @@ class Builder:
         :type template_values: dict
         :param logger: Logger where to store activity in
         :type logger: logging.Logger
+        :param cache: Parsed content cache, shared between builds
+        :type cache: ContentCache
+        :param stats: Statistics where to store the measures of the build
+        :type stats: BuildStats
+        :param tracer: Tracer where to record the spans of the build
+        :type tracer: Tracer
         :raise localeError: If the selected locale is not supported
+
+        .. versionchanged:: 1.4.0
+            Add the ``cache``, ``stats`` and ``tracer`` arguments.
         """
         self.site_config = site_config
         self.template_values = template_values
+        self.cache = cache if cache is not None else ContentCache()
+        self.stats = stats if stats is not None else BuildStats()
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+
+        # In a streaming build, the HTML of the entries is not kept in
+        # memory, but written to a temporary store if the feeds need it
+        self.streaming = self.site_config.get('build', {}).get('streaming')
+        self.spool = HtmlSpool(
+            self.site_config.get('wlocale').get('encoding')) \
+            if self.streaming else None
         self.site_config['dirs']['deploy'] = \
             os.path.join(self.site_config.get('dirs').get('deploy'),
                          self.site_config.get('uri').get('base'))
         self.logger = logger
 
-        # Set locale for the site.
-        self.old_locale = locale.getlocale()
+        # Set locale for the site, keeping the current setting as it is
+        # (``getlocale`` may return a name that cannot be set back)
+        self.old_locale = locale.setlocale(locale.LC_ALL)
         try:
             self.current_locale = \
                 locale.setlocale(locale.LC_ALL,
@@ -195,12 +301,84 @@ class Builder:
                 self.site_config.get('wlocale').get('language'),
         }
 
-        # Generate all entries metadata, once
-        self.entries_dict = self._gather_content_data().get('entries')
-        self.pages_dict = self._gather_content_data().get('pages')
+        # Markdown engine, which must be installed if it's not the default
+        self.markdown_backend = self.site_config.get('build', {}).get(
+            'markdown_backend', DEFAULT_BACKEND)
+        if self.markdown_backend != DEFAULT_BACKEND:
+            try:
+                markdown_backend(self.markdown_backend)
+            except (KeyError, ImportError):
+                self.logger and self.logger.error(
+                    "Unknown or unavailable Markdown backend")
+                sys.exit(23)
+
+        # Highlighted code blocks are kept in memory, and also on disk
+        # between builds if the highlight cache directory is set
+        HIGHLIGHT_CACHE.configure(
+            self.site_config.get('build', {}).get('highlight_cache'),
+            self.site_config.get('build', {}).get('highlight_cache_size',
+                                                  32 * 1024 * 1024))
+
+        # Rendered pages are written in the background, by a pool of
+        # threads, or right away if there are none
+        self.writer = WritePipeline(
+            self.site_config.get('build', {}).get('write_threads', 2),
+            tracer=self.tracer)
+
+        # Style sheets and scripts asked for by the templates, with the
+        # digest of their content in their names
+        self.assets = AssetPipeline(
+            self.static_dir,
+            os.path.join(self.site_config.get('dirs').get('deploy'),
+                         self.static_dir),
+            minify=self.site_config.get('build', {}).get('minify_assets',
+                                                         True),
+            encoding=self.site_config.get('wlocale').get('encoding'),
+            logger=self.logger)
+
+        # Images of the content resized to the configured widths, if any,
+        # which needs Pillow
+        self.images = None
+        image_widths = self.site_config.get('build', {}).get('image_widths')
+        if image_widths:
+            try:
+                import PIL  # noqa: F401
+            except ImportError:
+                self.logger and self.logger.error(
+                    "Pillow is not installed, needed to resize images")
+                sys.exit(43)
+            self.images = ImagePipeline(
+                image_widths,
+                [self.static_dir] +
+                list(self.site_config.get('dirs').get('extra') or []),
+                self.site_config.get('dirs').get('deploy'),
+                base_uri=self.site_config.get('uri').get('base'),
+                quality=self.site_config.get('build', {}).get(
+                    'image_quality', 82),
+                max_bytes=self.site_config.get('build', {}).get(
+                    'image_cache_size', 256 * 1024 * 1024))
+
+        # Pages whose template and values have not changed since the
+        # previous build are not rendered again, if enabled
+        fingerprints = self.site_config.get('build', {}).get('fingerprints')
+        self.fingerprints = RenderFingerprints(fingerprints)
+        if fingerprints:
+            self.fingerprints.salt = \
+                self._fingerprint_salt(self.fingerprints.assets)
+
+        # Generate all entries metadata, once, keeping the signature of
+        # every source file found
+        self.signatures = dict()
+        with self.stats.phase('gather'), \
+                self.tracer.span('gather', 'phase'):
+            content_data = self._gather_content_data()
+            self.cache.evict(self.signatures,
+                             (self.entries_dir, self.pages_dir))
+        self.entries_dict = content_data.get('entries')
+        self.pages_dict = content_data.get('pages')
 
     def __del__(self):
-        """Destructor.  Restore the locale, if changed.
+        """Destructor.
 
         At the end of the site generation, the destructor prints the
         maximum resident set size used of this class, if the logger is
@@ -224,7 +402,12 @@ class Builder:
         self.logger and self.logger.debug(
             'Maximum resident set size used: {} {}'.format(peak, units))
 
-        return locale.setlocale(locale.LC_ALL, self.old_locale)
+    def _restore_locale(self):
+        """Restore the locale set before the builder was created.
+
+        .. versionadded:: 1.4.0
+        """
+        locale.setlocale(locale.LC_ALL, self.old_locale)
 
     def gen_entry(self, filename, date_format='%c'):
         """Generate a HTML entry from its markup language counterpart.
@@ -235,12 +418,22 @@ class Builder:
         :type date_format: str
         :return: Generated HTML
         :rtype: str
+
+        .. versionchanged:: 1.4.0
+            In a streaming build, the content is not kept in the entry
+            metadata, but stored in the spool if the feeds need it.
         """
-        override = {'content': self._fetch_html(self.entries_dir, filename)}
-        self.entries_dict.get(filename).update(override)
+        meta = self.entries_dict.get(filename)
+        content = self._fetch_html(self.entries_dir, filename)
+        self._update_meta_date_format(meta, date_format)
+        if self.streaming:
+            if self._feeds_enabled() and not meta.get('private'):
+                self.spool.put(filename, content)
+            meta = dict(meta, content=content)
+        else:
+            meta['content'] = content
         values = self.template_values.copy()
-        values['entry'] = self.entries_dict.get(filename)
-        self._update_meta_date_format(values.get('entry'), date_format)
+        values['entry'] = meta
         outfile = self._make_output_file(
             values.get('entry').get('title'),
             self._entry_link_prefix(filename))
@@ -492,10 +685,14 @@ class Builder:
         :return: Generated HTML
         :rtype: str
         """
-        override = {'content': self._fetch_html(self.pages_dir, filename)}
-        self.pages_dict.get(filename).update(override)
+        content = self._fetch_html(self.pages_dir, filename)
         values = self.template_values.copy()
-        values['page'] = self.pages_dict.get(filename)
+        if self.streaming:
+            values['page'] = dict(self.pages_dict.get(filename),
+                                  content=content)
+        else:
+            self.pages_dict.get(filename)['content'] = content
+            values['page'] = self.pages_dict.get(filename)
         outfile = self._make_output_file(values.get('page').get('title'))
         return self._render_template('page.html.j2', outfile, values)
 
@@ -504,91 +701,96 @@ class Builder:
         for filename, meta in self.pages_dict.items():
             self.gen_page(filename)
 
-    def gen_feed(self, feed_format="atom", outfile='feed.xml'):
-        """Generate blog feed.
+    def gen_feeds(self, feed_formats=['atom'], max_entries=0,
+                  streaming=False, topics=False):
+        """Generate the blog feeds in all formats, and topic feeds.
+
+        The public entries are distributed in a single pass to the site
+        feed and, if ``topics`` is set, to one feed per category and one
+        feed per tag, and the newest ``max_entries`` of every feed are
+        selected with a heap, instead of sorting all of them.  The
+        content of every entry is rendered only once, even when it's in
+        many feeds, or in many formats.
+
+        The first format is written to ``feed.xml``, and every other
+        format, to a file named after it (``atom.xml`` or ``rss.xml``).
+        Topic feeds are written in the directories of their category or
+        tag pages, using the same filenames.
+
+        :param feed_formats: Feed formats ('rss' or 'atom'); invalid
+            values are ignored
+        :type feed_formats: list
+        :param max_entries: Max. entries in every feed, ``0`` for all
+        :type max_entries: int
+        :param streaming: Write the feeds entry by entry
+        :type streaming: bool
+        :param topics: Generate also category and tag feeds
+        :type topics: bool
 
-        :param feed_format: Feed format string ('rss' or 'atom').
-                            If invalid value, will default to 'atom'
-        :type feed_format: str
-        :param outfile: Output filename
-        :type outfile: str
+        .. versionadded:: 1.4.0
         """
-        if feed_format.lower() != "atom" and \
-           feed_format.lower() != "rss":
+        feed_formats = [feed_format.lower() for feed_format in feed_formats
+                        if feed_format.lower() in ('atom', 'rss')]
+        if not feed_formats:
             return
 
-        feed = FeedGenerator()
-        # feed.logo()
-        feed.id(self.site_config.get('info').get('site_name')
-                if self.site_config.get('info').get('site_name')
-                else self.site_config.get('uri').get('canonical'))
-        feed.title(self.site_config.get('info').get('site_name')
-                   if self.site_config.get('info').get('site_name')
-                   else self.site_config.get('uri').get('canonical'))
-        feed.subtitle(self.site_config.get('info').get('site_description')
-                      if self.site_config.get('info').get('site_description')
-                      else 'Feed')
-        feed.author({
-            'name':
-                self.site_config.get('info').get('site_author'),
-            'email':
-                self.site_config.get('info').get('site_author_email')
-        })
-        feed.description(self.site_config.get('info').get('site_description'))
-        feed.link(href=os.path.join(
-            self.site_config.get('uri').get('canonical'),
-            self.site_config.get('uri').get('base')),
-            rel='alternate')
-        feed.link(href=os.path.join(
-            self.site_config.get('uri').get('canonical'),
-            self.site_config.get('uri').get('base'),
-            outfile), rel='self')
-        feed.language(self.site_config.get('wlocale').get('language'))
-        feed.copyright(self.site_config.get('info').get('copyright'))
-
-        entries = list()
+        site, categories, tags = [], dict(), dict()
         for filename, meta in self.entries_dict.items():
-            if not meta.get('private'):
-                uri = self._make_uri(meta.get('title'), filename,
-                                     for_entry=True)
-                override = {
-                    'content':
-                        self._fetch_html(self.entries_dir, filename),
-                    'full_uri':
-                        os.path.join(
-                            self.site_config.get('uri').get('canonical'),
-                            self.site_config.get('uri').get('base'),
-                            uri),
-                }
-                self.entries_dict.get(filename).update(override)
-                entries.append(meta)
-
-        # Sort chronologically descent
-        entries = sorted(entries, key=lambda k: k.get('odate_idx'),
-                         reverse=True)
-        for entry in entries:
-            fnew = feed.add_entry()
-            fnew.id(slugify(strip_html_tags(entry.get('title'))))
-            fnew.title(entry.get('title'))
-            fnew.description(entry.get('content'))
-            if entry.get('mdate_html'):
-                fnew.updated(entry.get('mdate_html'))
-                fnew.published(entry.get('mdate_html'))
-            else:
-                fnew.updated(entry.get('odate_html'))
-            fnew.pubDate(entry.get('odate_html'))
-            # , 'email':entry.get('email')})
-            fnew.author({'name': entry.get('author')})
-            fnew.link(href=entry.get('full_uri'), rel='alternate')
-
-        if feed_format.lower() == "rss":
-            feed.rss_file(
-                os.path.join(
-                    self.site_config.get('dirs').get('deploy'), outfile))
-        elif feed_format.lower() == "atom":
-            feed.atom_file(
-                os.path.join(
-                    self.site_config.get('dirs').get('deploy'), outfile))
+            if meta.get('private'):
+                continue
+            site.append((filename, meta))
+            if topics:
+                categories.setdefault(meta.get('category'), []).append(
+                    (filename, meta))
+                for tag in meta.get('tag_list'):
+                    tags.setdefault(tag, []).append((filename, meta))
+
+        # Only the newest ``max_entries`` of every feed are taken, by
+        # using a heap, and every entry is made only once
+        feed_entries = dict()
+
+        def select(candidates):
+            selected = []
+            for filename, meta in latest_entries(
+                    candidates, max_entries,
+                    key=lambda k: (k[1].get('odate_idx'), k[0])):
+                if filename not in feed_entries:
+                    feed_entries[filename] = \
+                        self._feed_entry(filename, meta)
+                selected.append(feed_entries.get(filename))
+            return selected
+
+        site = select(site)
+        categories = {category: select(candidates)
+                      for category, candidates in categories.items()}
+        tags = {tag: select(candidates)
+                for tag, candidates in tags.items()}
+
+        contents = dict()
+
+        def fetch_content(entry):
+            filename = entry.get('filename')
+            if self.streaming:
+                return self._entry_content(filename)
+            if filename not in contents:
+                contents[filename] = self._entry_content(filename)
+            return contents.get(filename)
+
+        feeds = [('', '', None, site)]
+        feeds.extend((self.categories_dir, category, category, entries)
+                     for category, entries in categories.items())
+        feeds.extend((self.tags_dir, tag, tag, entries)
+                     for tag, entries in tags.items())
+        for infix, name, title, entries in feeds:
+            for idx, feed_format in enumerate(feed_formats):
+                outfile = 'feed.xml' if not idx else feed_format + '.xml'
+                if name:
+                    outfile = os.path.relpath(
+                        self._make_output_file(name, infix, index=outfile),
+                        self.site_config.get('dirs').get('deploy'))
+                self._write_feed(feed_format, outfile, entries,
+                                 self._feed_info(outfile, entries, title),
+                                 fetch_content, streaming)
 
     def gen_static(self):
         """Generate (copies) static directory.
@@ -604,7 +806,10 @@ class Builder:
             self.site_config.get('dirs').get('deploy'),
             self.static_dir)
         if Path(src).exists():
-            copy_tree_update(src, dst, update=True, verbose=True)
+            with self.tracer.span('copy', 'write', src=src):
+                self._count_copies(
+                    copy_tree_update(src, dst, update=True, verbose=True,
+                                     logger=self.logger))
 
     def gen_extra_dirs(self):
         """Generate extra directories if they exist.
@@ -622,7 +827,56 @@ class Builder:
                     os.path.join(self.site_config.get('dirs').get('deploy'),
                                  extra_dir)
                 if Path(src).exists():
-                    copy_tree_update(src, dst, update=True, verbose=True)
+                    with self.tracer.span('copy', 'write', src=src):
+                        self._count_copies(
+                            copy_tree_update(src, dst, update=True,
+                                             verbose=True,
+                                             logger=self.logger))
+
+    def gen_images(self):
+        """Make the responsive images of the content, if enabled.
+
+        ..see:: :mod:`pynfact.images`
+
+        .. versionadded:: 1.4.0
+        """
+        if not self.images:
+            return
+
+        resized, copied, unchanged, copied_bytes, removed = \
+            self.images.generate(self.logger, self.tracer)
+        self.stats.count('images_resized', resized)
+        self.stats.count('images_written', copied)
+        self.stats.count('images_unchanged', unchanged)
+        self.stats.count('bytes_written', copied_bytes)
+        self.stats.add_items(copied + unchanged)
+        resized and self.logger and self.logger.info(
+            'Resized {} images'.format(resized))
+        removed and self.logger and self.logger.info(
+            'Removed {} stale images'.format(removed))
+
+    def gen_precompressed(self):
+        """Write the compressed copies of the text files, if enabled.
+
+        ..see:: :mod:`pynfact.precompress`
+
+        .. versionadded:: 1.4.0
+        """
+        if not self.site_config.get('build', {}).get('precompress'):
+            return
+
+        from pynfact.precompress import precompress_tree
+
+        with self.tracer.span('precompress', 'write'):
+            compressed, compressed_bytes, removed = precompress_tree(
+                self.site_config.get('dirs').get('deploy'))
+        self.stats.count('files_compressed', compressed)
+        self.stats.count('bytes_written', compressed_bytes)
+        self.stats.add_items(compressed)
+        compressed and self.logger and self.logger.info(
+            'Compressed {} files'.format(compressed))
+        removed and self.logger and self.logger.info(
+            'Removed {} compressed copies of removed files'.format(removed))
 
     def gen_site(self):
         """Generate all website content.
@@ -631,22 +885,95 @@ class Builder:
             The first thing that has to be generated is the navigation
             links for all user defined pages.  Otherwise those links
             could be left behind on page pages.
+
+        .. versionchanged:: 1.4.0
+            The generation is split in the phases of :func:`site_phases`.
+
+        .. versionchanged:: 1.4.0
+            The pages are written in the background by a
+            :class:`WritePipeline`, flushed at the end of every phase.
+
+        .. versionchanged:: 1.4.0
+            Log a line per phase, with the number of files updated,
+            instead of a line per file, which is now a debug message.
+
+        .. versionchanged:: 1.4.0
+            Restore the locale at the end, instead of in the destructor,
+            which may run during another build.
         """
         self.logger and self.logger.info('Building static website...')
 
-        self.gen_nav_page_links()
-        self.gen_entries(self.site_config.get('date_format').get('entry'))
-        self.gen_pages()
-        self.gen_archive(self.site_config.get('date_format').get('list'))
-        self.gen_categories(self.site_config.get('date_format').get('list'))
-        self.gen_category_list(self.site_config.get('date_format').get('list'))
-        self.gen_tags(self.site_config.get('date_format').get('list'))
-        self.gen_tag_cloud()
-        self.gen_home(self.site_config.get('presentation').get('max_entries'),
-                      self.site_config.get('date_format').get('home'))
-        self.gen_feed(self.site_config.get('presentation').get('feed_format'))
-        self.gen_static()
-        self.gen_extra_dirs()
+        fragment_cache = self._jinja_environment().fragment_cache
+        fragment_cache.clear()
+        try:
+            for phase, generate in self.site_phases():
+                written, unchanged = self._output_counters()
+                with self.stats.phase(phase), \
+                        self.tracer.span(phase, 'phase'):
+                    generate()
+                    self.writer.flush()
+                self._log_phase(phase, written, unchanged)
+        finally:
+            self.writer.close()
+            self.spool and self.spool.close()
+            self._restore_locale()
+
+        self.stats.count('highlight_hits', HIGHLIGHT_CACHE.hits)
+        self.stats.count('highlight_misses', HIGHLIGHT_CACHE.misses)
+        HIGHLIGHT_CACHE.prune()
+        self.stats.count('pages_written', self.assets.written)
+        self.stats.count('pages_unchanged', self.assets.unchanged)
+        self.stats.count('bytes_written', self.assets.bytes_written)
+        self.assets.removed and self.logger and self.logger.info(
+            'Removed {} stale assets'.format(self.assets.removed))
+        self.stats.count('fragment_hits', fragment_cache.hits)
+        self.stats.count('fragment_misses', fragment_cache.misses)
+        fragment_cache.clear()
+        if self.fingerprints.path:
+            self.fingerprints.save(self._fingerprint_salt(self.assets.urls),
+                                   self.assets.urls)
+
+    def site_phases(self):
+        """List the phases of the website generation, in order.
+
+        Every phase is a tuple ``(name, generate)``, where ``generate``
+        is a callable without arguments.  Calling them all in order,
+        and then flushing the ``writer``, is the same as calling
+        :func:`gen_site`, but it allows to measure every phase on its
+        own.
+
+        :return: List of phases
+        :rtype: list
+
+        .. versionadded:: 1.4.0
+        """
+        date_format = self.site_config.get('date_format')
+        presentation = self.site_config.get('presentation')
+        return [
+            ('nav_page_links', self.gen_nav_page_links),
+            ('entries',
+             lambda: self.gen_entries(date_format.get('entry'))),
+            ('pages', self.gen_pages),
+            ('archive', lambda: self.gen_archive(date_format.get('list'))),
+            ('categories',
+             lambda: self.gen_categories(date_format.get('list'))),
+            ('category_list',
+             lambda: self.gen_category_list(date_format.get('list'))),
+            ('tags', lambda: self.gen_tags(date_format.get('list'))),
+            ('tag_cloud', self.gen_tag_cloud),
+            ('home', lambda: self.gen_home(presentation.get('max_entries'),
+                                           date_format.get('home'))),
+            ('feeds', lambda: self.gen_feeds(
+                presentation.get('feed_formats'),
+                max_entries=presentation.get('feed_max_entries'),
+                streaming=presentation.get('feed_streaming')
+                or self.streaming,
+                topics=presentation.get('feed_topics'))),
+            ('static', self.gen_static),
+            ('extra_dirs', self.gen_extra_dirs),
+            ('images', self.gen_images),
+            ('precompress', self.gen_precompressed),
+        ]
 
     def _gather_content_data(self):
         """Gather all metadata from all parseable files.
@@ -674,51 +1001,79 @@ class Builder:
                 }
             }
 
+        The files are looked for in the subdirectories too, and every
+        one is identified by its path relative to the entries or pages
+        directory, such as ``2024/my-post.md``.
+
         :return: Dictionary of all parseabe objects and their metadata
         :rtype: dict
+
+        .. versionchanged:: 1.4.0
+            Look for files in subdirectories, skipping the ignored ones.
         """
         # Gather entries
         entries_dict = dict()
-        if os.path.isdir(self.entries_dir):
-            for filename in os.listdir(self.entries_dir):
-                if has_extension_md_rst(filename):
-                    meta = self._fetch_meta(self.entries_dir, filename,
-                                            odate_required=True)
-
-                    override_entry = {
-                        'category_uri':
-                            self._make_uri(meta.category(),
-                                           self.categories_dir,
-                                           for_entry=False),
-                        'odate_idx': meta.odate('%Y-%m-%d %H:%M:%S'),
-                        'oyear_idx': meta.odate('%Y'),
-                        'omonth_idx': meta.odate('%m-%d'),
-                        'site_comments':
-                            self.site_config.get(
-                                'presentation').get('comments'),
-                        'uri':
-                            self._make_uri(meta.title(),
-                                           filename, for_entry=True,
-                                           absolute=True),
-                    }
-                    entries_dict[filename] = \
-                        meta.as_dict(override_entry, self.meta_defaults)
+        for filename in self._scan_sources(self.entries_dir):
+            meta = self._fetch_meta(self.entries_dir, filename,
+                                    odate_required=True)
+
+            override_entry = {
+                'category_uri':
+                    self._make_uri(meta.category(),
+                                   self.categories_dir,
+                                   for_entry=False),
+                'odate_idx': meta.odate('%Y-%m-%d %H:%M:%S'),
+                'oyear_idx': meta.odate('%Y'),
+                'omonth_idx': meta.odate('%m-%d'),
+                'site_comments':
+                    self.site_config.get(
+                        'presentation').get('comments'),
+                'uri':
+                    self._make_uri(meta.title(),
+                                   filename, for_entry=True,
+                                   absolute=True),
+            }
+            entries_dict[filename] = \
+                meta.as_dict(override_entry, self.meta_defaults)
+            self.stats.add_items()
 
         # Gather pages
         pages_dict = dict()
-        if os.path.isdir(self.pages_dir):
-            for filename in os.listdir(self.pages_dir):
-                if has_extension_md_rst(filename):
-                    meta = self._fetch_meta(self.pages_dir, filename,
-                                            odate_required=False)
+        for filename in self._scan_sources(self.pages_dir):
+            meta = self._fetch_meta(self.pages_dir, filename,
+                                    odate_required=False)
 
-                    override_page = {'uri': self._make_uri(meta.title(),
-                                                           for_entry=False)}
-                    pages_dict[filename] = \
-                        meta.as_dict(override_page, self.meta_defaults)
+            override_page = {'uri': self._make_uri(meta.title(),
+                                                   for_entry=False)}
+            pages_dict[filename] = \
+                meta.as_dict(override_page, self.meta_defaults)
+            self.stats.add_items()
 
         return {'entries': entries_dict, 'pages': pages_dict}
 
+    def _scan_sources(self, directory):
+        """Find the source files in a directory and its subdirectories.
+
+        The status of every file found is kept, so the content cache
+        does not need to retrieve it again to check if it has changed.
+
+        :param directory: Directory where to look for source files
+        :type directory: str
+        :return: Path of every source file relative to ``directory``
+        :rtype: list
+
+        .. versionadded:: 1.4.0
+        """
+        if not os.path.isdir(directory):
+            return []
+
+        sources = scan_sources(directory, self.site_config.get(
+            'build', {}).get('ignore_patterns', ['.*']))
+        for filename, st in sources:
+            self.signatures[os.path.join(directory, filename)] = \
+                ContentCache.signature(filename, st)
+        return [filename for filename, st in sources]
+
     def _update_meta_date_format(self, meta, date_format):
         """Update the date format from a meta dictionary object.
 
@@ -742,6 +1097,97 @@ class Builder:
         if meta.get('mdate'):
             meta['mdate'] = meta.get('mdate_info').strftime(date_format)
 
+    def _fingerprint_salt(self, assets=()):
+        """Digest everything the pages depend on, but their values.
+
+        That is, the content of every template, since a template may
+        include or extend any other, the site configuration, the version
+        of PynFact, and the names of the assets asked for by the
+        templates, with the digest of their content (the only part of
+        the static files the pages depend on).  The assets linked in the
+        previous build are made again for that, before rendering any
+        page, which only reads the files they are made of.
+
+        :param assets: Assets asked for by the templates, as tuples of
+            the arguments of ``asset_bundle``
+        :type assets: iterable
+
+        :return: Hexadecimal digest
+        :rtype: str
+
+        .. versionadded:: 1.4.0
+        """
+        from pynfact.main import __version__
+
+        digest = hashlib.sha1(__version__.encode('utf-8'))
+        digest.update(repr(self.site_config).encode('utf-8'))
+        for directory in (self.templates_dir, self.builtin_templates_dir):
+            for root, dirs, files in os.walk(directory):
+                dirs.sort()
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    digest.update(b'\0' + path.encode('utf-8') + b'\0')
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+        for key in sorted(assets):
+            url = self.assets.bundle(*key) if all(
+                os.path.isfile(os.path.join(self.static_dir, path))
+                for path in key[1:]) else ''
+            digest.update(b'\0' + url.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _jinja_environment(self):
+        """Get the Jinja2 environment of the templates of the website.
+
+        The environment is shared by every builder with the same
+        templates and locale, so it must not keep any reference to this
+        one: the functions of the templates bound to this builder, such
+        as ``asset_url`` and ``asset_bundle``, are passed on every
+        render by :func:`_render_template` instead.
+
+        :return: Jinja2 environment, as in :func:`jinja_environment`
+        :rtype: jinja2.Environment
+
+        .. versionadded:: 1.4.0
+        """
+        env = jinja_environment(
+            (os.path.abspath(self.templates_dir),
+             os.path.abspath(self.builtin_templates_dir)),
+            self.locale_dir, self.current_locale)
+        return env
+
+    def _asset_url(self, path):
+        """Make a single asset asked for by a template.
+
+        :param path: File, relative to the static directory
+        :type path: str
+        :return: Path of the asset, as in :func:`_asset_bundle`
+        :rtype: str
+
+        .. versionadded:: 1.4.0
+        """
+        return self._asset_bundle(path, path)
+
+    def _asset_bundle(self, name, *paths):
+        """Make an asset asked for by a template.
+
+        :param name: Name of the bundle, relative to the static
+            directory
+        :type name: str
+        :param paths: Files to join, relative to the static directory
+        :type paths: str
+        :return: Path of the asset, as in :class:`AssetPipeline`
+        :rtype: str
+
+        .. versionadded:: 1.4.0
+        """
+        try:
+            return self.assets.bundle(name, *paths)
+        except FileNotFoundError as e:
+            self.logger and self.logger.error(
+                'Static asset not found: "{}"'.format(e.filename))
+            sys.exit(42)
+
     def _render_template(self, template, output_data, values):
         """Render a template using Jinja2.
 
@@ -749,43 +1195,131 @@ class Builder:
         :type template: str
         :param output_data: File where the data is saved
         :type output_data: str
-        :return: Generated HTML of the output data
+        :return: Generated HTML of the output data, or ``None`` if the
+            page has not changed since the previous build
         :rtype: str
+
+        .. versionchanged:: 1.4.0
+            The page is not rendered if its fingerprint is the same as
+            in the previous build, as in :class:`RenderFingerprints`.
+
+        .. versionchanged:: 1.4.0
+            The page is minified, if enabled, by
+            :func:`pynfact.htmlmin.minify_html`.
+        """
+        if self.fingerprints.path and self.fingerprints.unchanged(
+                output_data, self.fingerprints.fingerprint(template, values)):
+            self.stats.count('pages_skipped')
+            self.stats.add_items()
+            return None
+
+        env = self._jinja_environment()
+        with self.tracer.span('render', 'template', template=template,
+                              output=output_data):
+            compiled = env.templates_compiled
+            template = env.get_template(template)
+            self.stats.count('templates_compiled',
+                             env.templates_compiled - compiled)
+            html = template.render(asset_url=self._asset_url,
+                                   asset_bundle=self._asset_bundle,
+                                   **values)
+        if self.site_config.get('build', {}).get('minify_html'):
+            with self.tracer.span('minify', 'render', output=output_data):
+                html = minify_html(html)
+        self.stats.count('pages_rendered')
+        self.stats.add_items()
+
+        # Update only those files that are different in content, in
+        # the background while the next pages are rendered (the writer
+        # traces every write in the thread that does it)
+        self.writer.submit(
+            output_data,
+            html.encode(self.site_config.get('wlocale').get('encoding')),
+            self._count_output)
+
+        return html
+
+    def _replace_output(self, output):
+        """Replace an output file with its new version, if different.
+
+        The new version is the file with the same name ended in ``~``.
+
+        :param output: Output file
+        :type output: str
+        :return: ``True`` if the file has been updated
+        :rtype: bool
+
+        .. versionadded:: 1.4.0
+        """
+        updated = replace_if_changed(output + '~', output)
+        self._count_output(output, updated,
+                           os.path.getsize(output) if updated else 0)
+        return updated
+
+    def _count_output(self, output, updated, size):
+        """Count an output file, once written.
+
+        :param output: Output file
+        :type output: str
+        :param updated: The file has been updated
+        :type updated: bool
+        :param size: Size of the file, in bytes
+        :type size: int
+
+        .. versionadded:: 1.4.0
         """
-        trans = gettext.translation('default', self.locale_dir,
-                                    [self.current_locale])
-        env = Environment(extensions=['jinja2.ext.i18n'],
-                          loader=FileSystemLoader(
-                              [self.templates_dir,
-                               self.builtin_templates_dir]))
-        env.install_gettext_translations(trans)
-        env.globals['slugify'] = slugify  # Add `slugify` to Jinja2
-        env.globals['strip_html_tags'] = strip_html_tags
-        template = env.get_template(template)
-        html = template.render(**values)
-
-        # Update only those files that are different in content
-        # comparing with a cache file
-        with open(output_data + '~', mode="w",
-                  encoding=self.site_config.get('wlocale').get('encoding')) \
-                as cache_file:
-            cache_file.write(html)
-
-        if not os.path.exists(output_data) or \
-           not filecmp.cmp(output_data + '~', output_data):
-            with open(
-                output_data, mode="w",
-                encoding=self.site_config.get('wlocale').get('encoding')) \
-                    as output_file:
-                output_file.write(html)
+        if updated:
+            self.stats.count('pages_written')
+            self.stats.count('bytes_written', size)
+            self.logger and self.logger.debug(
+                'Updated content of: "{}"'.format(output))
+        else:
+            self.stats.count('pages_unchanged')
+
+    def _output_counters(self):
+        """Get the number of output files written and unchanged so far.
+
+        :return: Files written, and files unchanged
+        :rtype: tuple
+
+        .. versionadded:: 1.4.0
+        """
+        return (self.stats.counters.get('pages_written'),
+                self.stats.counters.get('pages_unchanged'))
+
+    def _log_phase(self, phase, written, unchanged):
+        """Log a summary of the output files of a phase.
+
+        :param phase: Phase name
+        :type phase: str
+        :param written: Files written before the phase
+        :type written: int
+        :param unchanged: Files unchanged before the phase
+        :type unchanged: int
+
+        .. versionadded:: 1.4.0
+        """
+        now_written, now_unchanged = self._output_counters()
+        if now_written > written or now_unchanged > unchanged:
             self.logger and self.logger.info(
-                'Updated content of: "{}"'.format(output_data))
+                'Updated {} of {} files: {}'.format(
+                    now_written - written,
+                    now_written - written + now_unchanged - unchanged,
+                    phase))
 
-        # Clear cache, both in memory and space
-        filecmp.clear_cache()
-        os.remove(output_data + '~')
+    def _count_copies(self, copies):
+        """Count the files copied by :func:`copy_tree_update`.
 
-        return html
+        :param copies: Copied files, unchanged files and copied bytes
+        :type copies: tuple
+
+        .. versionadded:: 1.4.0
+        """
+        copied, unchanged, copied_bytes = copies
+        self.stats.count('pages_written', copied)
+        self.stats.count('pages_unchanged', unchanged)
+        self.stats.count('bytes_written', copied_bytes)
+        self.stats.add_items(copied + unchanged)
 
     def _fetch_markup(self, directory, filename):
         """Parse an input file depending on its extension.
@@ -802,9 +1336,46 @@ class Builder:
 
         .. sealso:: :class:`Parser`
         """
+        self.stats.count('files_parsed')
         return Parser(os.path.join(directory, filename),
                       encoding=self.site_config.get('wlocale').get('encoding'),
-                      logger=self.logger)
+                      logger=self.logger,
+                      markdown_backend=self.markdown_backend)
+
+    def _cached(self, directory, filename, kind, producer):
+        """Get a value from the content cache, counting the hits.
+
+        In a streaming build the HTML content is not cached, so it's not
+        kept in memory, and it's always produced; the metadata, needed
+        by every listing, is cached as in any other build.
+
+        :param directory: Markdown or reStructuredText file directory
+        :type directory: str
+        :param filename: Markdown or reStructuredText file to parse
+        :type filename: str
+        :param kind: Identifier of the value, such as "meta" or "html"
+        :type kind: str
+        :param producer: Callable without arguments computing the value
+        :type producer: callable
+        :return: The cached or newly produced value
+
+        .. versionadded:: 1.4.0
+        """
+        produced = []
+
+        def produce():
+            produced.append(kind)
+            with self.tracer.span('parse ' + kind, 'parse',
+                                  file=os.path.join(directory, filename)):
+                return producer()
+
+        if self.streaming and kind == 'html':
+            return produce()
+        path = os.path.join(directory, filename)
+        value = self.cache.get(path, kind, produce,
+                               signature=self.signatures.get(path))
+        produced or self.stats.count('cache_hits')
+        return value
 
     def _fetch_html(self, directory, filename):
         """Fetch HTML content out of a markup language input file.
@@ -815,8 +1386,48 @@ class Builder:
         :type filename: str
         :return: HTML content for the parsed file
         :rtype: str
+
+        .. versionchanged:: 1.4.0
+            Parse the file only if it's not in the content cache.
+
+        .. versionchanged:: 1.4.0
+            Rewrite the ``<img>`` tags with the responsive images, if
+            enabled, as in :class:`ImagePipeline`.
         """
-        return self._fetch_markup(directory, filename).html()
+        content = self._cached(
+            directory, filename, 'html',
+            lambda: self._fetch_markup(directory, filename).html())
+        return self.images.rewrite(content) if self.images else content
+
+    def _entry_content(self, filename):
+        """Get the HTML content of an entry.
+
+        In a streaming build it's read from the spool, where it was
+        stored when the entry was generated; otherwise, or if it's not
+        there, it's taken from the content cache, or parsed.
+
+        :param filename: Markdown or reStructuredText file of the entry
+        :type filename: str
+        :return: HTML content of the entry
+        :rtype: str
+
+        .. versionadded:: 1.4.0
+        """
+        content = self.spool.get(filename) if self.spool else None
+        return content if content is not None else \
+            self._fetch_html(self.entries_dir, filename)
+
+    def _feeds_enabled(self):
+        """Check if any feed is going to be generated.
+
+        :return: ``True`` if there is any valid feed format
+        :rtype: bool
+
+        .. versionadded:: 1.4.0
+        """
+        return any(feed_format.lower() in ('atom', 'rss')
+                   for feed_format in self.site_config.get(
+                       'presentation').get('feed_formats', []))
 
     def _fetch_meta(self, directory, filename, odate_required=False):
         """Fetch metadata out of a markup language input file.
@@ -833,9 +1444,169 @@ class Builder:
         :type odate_required: bool
         :return: Parsed file metadata
         :rtype: Meta
+
+        .. versionchanged:: 1.4.0
+            Parse the file only if it's not in the content cache.
         """
-        return Meta(self._fetch_markup(directory, filename).metadata(),
-                    filename, odate_required, logger=self.logger)
+        metadata = self._cached(
+            directory, filename, 'meta',
+            lambda: self._fetch_markup(directory, filename).metadata())
+        return Meta(metadata, filename, odate_required, logger=self.logger)
+
+    def _write_feed(self, feed_format, outfile, entries, info,
+                    fetch_content, streaming=False):
+        """Write a feed, only if its content has changed.
+
+        :param feed_format: Feed format string ('rss' or 'atom')
+        :type feed_format: str
+        :param outfile: Output filename, relative to the deploy dir.
+        :type outfile: str
+        :param entries: Entries in the feed, as in :func:`_feed_entry`
+        :type entries: list
+        :param info: Feed information, as in :func:`_feed_info`
+        :type info: dict
+        :param fetch_content: Callable that returns the HTML content of
+            an entry, given the entry itself
+        :type fetch_content: callable
+        :param streaming: Write the feed entry by entry
+        :type streaming: bool
+
+        .. versionadded:: 1.4.0
+        """
+        output = os.path.join(self.site_config.get('dirs').get('deploy'),
+                              outfile)
+        with self.tracer.span('feed', 'write', output=output,
+                              format=feed_format):
+            self._write_feed_file(feed_format, output, entries, info,
+                                  fetch_content, streaming)
+        self.stats.add_items()
+        self._replace_output(output)
+
+    def _write_feed_file(self, feed_format, output, entries, info,
+                         fetch_content, streaming=False):
+        """Write a feed to a temporary file, ended in ``~``.
+
+        :param feed_format: Feed format string ('rss' or 'atom')
+        :type feed_format: str
+        :param output: Output file, including the deploy dir.
+        :type output: str
+        :param entries: Entries in the feed, as in :func:`_feed_entry`
+        :type entries: list
+        :param info: Feed information, as in :func:`_feed_info`
+        :type info: dict
+        :param fetch_content: Callable that returns the HTML content of
+            an entry, given the entry itself
+        :type fetch_content: callable
+        :param streaming: Write the feed entry by entry
+        :type streaming: bool
+
+        .. versionadded:: 1.4.0
+        """
+        if streaming:
+            writer = StreamFeedWriter(
+                output + '~', feed_format, info,
+                encoding=self.site_config.get('wlocale').get('encoding'))
+            writer.write(entries, fetch_content)
+        else:
+            from feedgen.feed import FeedGenerator
+
+            feed = FeedGenerator()
+            # feed.logo()
+            feed.id(info.get('id'))
+            feed.title(info.get('title'))
+            feed.subtitle(info.get('subtitle'))
+            feed.author({'name': info.get('author'),
+                         'email': info.get('email')})
+            feed.description(info.get('description'))
+            # RSS takes the last link as the channel link
+            feed.link(href=info.get('self_link'), rel='self')
+            feed.link(href=info.get('link'), rel='alternate')
+            feed.language(info.get('language'))
+            feed.copyright(info.get('copyright'))
+
+            for entry in entries:
+                fnew = feed.add_entry()
+                fnew.id(entry.get('id'))
+                fnew.title(entry.get('title'))
+                fnew.description(fetch_content(entry))
+                fnew.updated(entry.get('updated'))
+                fnew.pubDate(entry.get('published'))
+                # , 'email':entry.get('email')})
+                fnew.author({'name': entry.get('author')})
+                fnew.link(href=entry.get('link'), rel='alternate')
+
+            feed.updated(info.get('updated'))
+
+            if feed_format.lower() == "rss":
+                feed.rss_file(output + '~')
+            elif feed_format.lower() == "atom":
+                feed.atom_file(output + '~')
+
+    def _feed_info(self, outfile='feed.xml', entries=[], topic=None):
+        """Gather the information that describes the feed itself.
+
+        The update date of the feed is the newest update date of its
+        entries, so the same entries produce always the same feed.
+
+        :param outfile: Output filename, to make the self link
+        :type outfile: str
+        :param entries: Entries in the feed, as in :func:`_feed_entry`
+        :type entries: list
+        :param topic: Category or tag name of a topic feed
+        :type topic: str
+        :return: Feed information, as in :class:`StreamFeedWriter`
+        :rtype: dict
+
+        .. versionadded:: 1.4.0
+        """
+        site_info = self.site_config.get('info')
+        site_uri = self.site_config.get('uri')
+        name = site_info.get('site_name') or site_uri.get('canonical')
+        link = os.path.join(site_uri.get('canonical'), site_uri.get('base'))
+        if topic:
+            name = '{} — {}'.format(name, strip_html_tags(topic))
+            link = os.path.join(link, os.path.dirname(outfile))
+        return {
+            'id': name,
+            'title': name,
+            'subtitle': site_info.get('site_description') or 'Feed',
+            'description': site_info.get('site_description'),
+            'author': site_info.get('site_author'),
+            'email': site_info.get('site_author_email'),
+            'link': link,
+            'self_link': os.path.join(site_uri.get('canonical'),
+                                      site_uri.get('base'), outfile),
+            'language': self.site_config.get('wlocale').get('language'),
+            'copyright': site_info.get('copyright'),
+            'updated': max((entry.get('updated') for entry in entries),
+                           default=datetime(1970, 1, 1, tzinfo=tz.tzutc())),
+        }
+
+    def _feed_entry(self, filename, meta):
+        """Gather the information of an entry that goes into a feed.
+
+        :param filename: Markdown or reStructuredText file of the entry
+        :type filename: str
+        :param meta: Entry metadata, as in :func:`Meta.as_dict`
+        :type meta: dict
+        :return: Feed entry, as in :class:`StreamFeedWriter`
+        :rtype: dict
+
+        .. versionadded:: 1.4.0
+        """
+        uri = self._make_uri(meta.get('title'), filename, for_entry=True)
+        return {
+            'filename': filename,
+            'id': slugify(strip_html_tags(meta.get('title'))),
+            'title': meta.get('title'),
+            'author': meta.get('author'),
+            'link': os.path.join(self.site_config.get('uri').get('canonical'),
+                                 self.site_config.get('uri').get('base'),
+                                 uri),
+            'updated': parse_feed_date(meta.get('mdate_html') or
+                                       meta.get('odate_html')),
+            'published': parse_feed_date(meta.get('odate_html')),
+        }
 
     def _entry_link_prefix(self, entry):
         """Compute entry final path.
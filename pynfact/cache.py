@@ -0,0 +1,290 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+In-memory cache of parsed content, on-disk store of rendered HTML, and
+fingerprints of the rendered pages.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+
+class ContentCache:
+    """Keep the parsed content of the source files while unchanged.
+
+    Every source file is identified by its absolute path, and every
+    cached value is stored along with the signature of the file when it
+    was parsed (modification time and size).  If the file changes, the
+    value is computed again.
+
+    A single build uses this cache to avoid parsing the same file more
+    than once; a long-lived process, such as the build daemon, keeps it
+    between builds, so only the files that have changed are parsed
+    again.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.values = dict()
+
+    def __len__(self):
+        """Return the number of cached values."""
+        return len(self.values)
+
+    def get(self, path, kind, producer, signature=None):
+        """Get a cached value, or produce it if missing or outdated.
+
+        :param path: Source file the value is computed from
+        :type path: str
+        :param kind: Identifier of the value, such as "meta" or "html"
+        :type kind: str
+        :param producer: Callable without arguments computing the value
+        :type producer: callable
+        :param signature: Signature of the file, if already known, as
+            in :func:`signature`
+        :type signature: tuple
+        :return: The cached or newly produced value
+
+        .. versionchanged:: 1.4.0
+            Add the ``signature`` argument, to avoid a new ``stat``.
+        """
+        key = (os.path.abspath(path), kind)
+        signature = signature or self.signature(path)
+        cached = self.values.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        value = producer()
+        self.values[key] = (signature, value)
+        return value
+
+    def clear(self):
+        """Remove all cached values."""
+        self.values.clear()
+
+    def evict(self, paths, directories):
+        """Remove the values of the files no longer in some directories.
+
+        Only the values of the files in ``directories`` are checked, so
+        a long-lived process building several websites keeps the values
+        of the others.
+
+        :param paths: Source files found in the directories
+        :type paths: iterable
+        :param directories: Directories where the files were found
+        :type directories: iterable
+        :return: Number of values removed
+        :rtype: int
+        """
+        found = {os.path.abspath(path) for path in paths}
+        prefixes = tuple(os.path.join(os.path.abspath(directory), '')
+                         for directory in directories)
+        stale = [key for key in self.values
+                 if key[0].startswith(prefixes) and key[0] not in found]
+        for key in stale:
+            del self.values[key]
+        return len(stale)
+
+    @staticmethod
+    def signature(path, st=None):
+        """Compute the signature of a file.
+
+        :param path: File to compute the signature of
+        :type path: str
+        :param st: Status of the file, if already known
+        :type st: os.stat_result
+        :return: Modification time in nanoseconds and size
+        :rtype: tuple
+        """
+        st = st or os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+
+class HtmlSpool:
+    """Temporary on-disk store of rendered HTML.
+
+    In a streaming build, the HTML of every entry is written here as
+    soon as it's rendered, instead of being kept in memory, and read
+    back later only if it's needed again, such as in the feeds.
+
+    The store is a temporary directory, removed by :func:`close` or,
+    at the latest, when the object is garbage collected.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, encoding='utf-8'):
+        """Constructor.
+
+        :param encoding: Encoding of the stored files
+        :type encoding: str
+        """
+        self.encoding = encoding
+        self.path = tempfile.mkdtemp(prefix='pynfact-spool-')
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path,
+                                           ignore_errors=True)
+
+    def __contains__(self, key):
+        """Check if there is HTML stored for a key."""
+        return os.path.exists(self._filename(key))
+
+    def put(self, key, html):
+        """Store the HTML of a key.
+
+        :param key: Identifier of the HTML, such as the source filename
+        :type key: str
+        :param html: HTML to store
+        :type html: str
+        """
+        with open(self._filename(key), 'w', encoding=self.encoding) as f:
+            f.write(html)
+
+    def get(self, key, default=None):
+        """Read the HTML of a key.
+
+        :param key: Identifier of the HTML
+        :type key: str
+        :param default: Value returned if the key is not stored
+        :return: Stored HTML, or ``default``
+        :rtype: str
+        """
+        try:
+            with open(self._filename(key), encoding=self.encoding) as f:
+                return f.read()
+        except FileNotFoundError:
+            return default
+
+    def close(self):
+        """Remove the store and all its content."""
+        self._finalizer()
+
+    def _filename(self, key):
+        """Get the file where the HTML of a key is stored."""
+        return os.path.join(self.path, hashlib.sha1(
+            key.encode('utf-8')).hexdigest() + '.html')
+
+
+class RenderFingerprints:
+    """Fingerprints of the pages rendered by the previous build.
+
+    The fingerprint of a page is a digest of its template and of the
+    values passed to it.  Everything else a page depends on (all the
+    templates, the configuration, the version of PynFact, and the
+    assets linked by the templates) is digested in a ``salt``, the same
+    for all the pages.  If the salt is the same as in the previous
+    build, and so is the fingerprint of a page, and its output file is
+    still there, the page has not changed, so it's not rendered again.
+
+    The values are digested through their ``repr``.  A value whose
+    ``repr`` is not the same from one build to the next, such as the
+    default ``repr`` of an object, only causes the page to be rendered
+    every time, but never to be wrongly skipped.
+
+    The fingerprints are stored in a JSON file at the end of the build,
+    only for the pages of that build, along with the salt, and the
+    ``assets`` asked for by the templates (as the arguments of
+    ``asset_bundle``), needed to compute the salt of the next build.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, path=None, salt=''):
+        """Constructor.
+
+        :param path: JSON file where the fingerprints are stored, or
+            ``None`` to never skip any page
+        :type path: str
+        :param salt: Digest of everything the pages depend on, other
+            than their template and values
+        :type salt: str
+        """
+        self.path = path
+        self.salt = salt
+        self.previous, self.previous_salt, self.assets = \
+            self._load() if path else (dict(), None, [])
+        self.current = dict()
+
+    def fingerprint(self, template, values):
+        """Compute the fingerprint of a page.
+
+        :param template: Template name
+        :type template: str
+        :param values: Values passed to the template
+        :type values: dict
+        :return: Hexadecimal digest
+        :rtype: str
+        """
+        digest = hashlib.sha1(template.encode('utf-8'))
+        digest.update(b'\0' + repr(sorted(values.items())).encode(
+            'utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    def unchanged(self, output, fingerprint):
+        """Check if a page is the same as in the previous build.
+
+        In any case, the fingerprint is kept for the next build.
+
+        :param output: Output file of the page
+        :type output: str
+        :param fingerprint: Fingerprint of the page, as in
+            :func:`fingerprint`
+        :type fingerprint: str
+        :return: ``True`` if the page needs not be rendered
+        :rtype: bool
+        """
+        self.current[output] = fingerprint
+        return bool(self.path) and self.previous_salt == self.salt and \
+            self.previous.get(output) == fingerprint and \
+            os.path.exists(output)
+
+    def save(self, salt=None, assets=()):
+        """Write the fingerprints of the pages of this build.
+
+        The file is written to a temporary file first, so it's never
+        left half written.  Any error is ignored, since the only effect
+        is that all the pages are rendered in the next build.
+
+        :param salt: Salt of the next build, if the assets are the same,
+            by default the salt of this build
+        :type salt: str
+        :param assets: Assets asked for by the templates in this build,
+            as tuples of the arguments of ``asset_bundle``
+        :type assets: iterable
+        """
+        if not self.path:
+            return
+
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'pages': self.current,
+                           'salt': self.salt if salt is None else salt,
+                           'assets': sorted(list(key) for key in assets)},
+                          f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def _load(self):
+        """Read the fingerprints, salt and assets of the previous build."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                fingerprints = json.load(f)
+            pages = fingerprints['pages']
+            salt = fingerprints['salt']
+            assets = [tuple(key) for key in fingerprints['assets']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return dict(), None, []
+        return (pages, salt, assets) if isinstance(pages, dict) \
+            else (dict(), None, [])
@@ -2,6 +2,10 @@
 """
 Command line interface functions.
 
+Every function imports the modules it needs when it is called, so the
+command line starts fast, and the build modules (and their dependencies,
+such as Jinja2, Markdown or docutils) are only loaded when building.
+
 :copyright: © 2012-2025, J. A. Corbal
 :license: MIT
 """
@@ -10,13 +14,9 @@ import os
 import shutil
 import sys
 
-from pynfact.builder import Builder
-from pynfact.server import Server
-from pynfact.yamler import Yamler
-
 
 def set_logger(verbosity=False, error_log='pynfact.log',
-               echo_log=sys.stdout):
+               echo_log=sys.stdout, queued=False):
     """Set up the system logger.
 
     This function starts two logs, one stream on the standard output
@@ -70,6 +70,8 @@ def set_logger(verbosity=False, error_log='pynfact.log',
     :type error_log: str
     :param echo_log: Stream to write the default information log
     :type echo_log: _io.TextIOWrapper
+    :param queued: Write the messages in a background thread
+    :type queued: bool
 
     .. versionchanged:: 1.3.1a4
         If the error log is set to "None" (case insensitive), deactivate
@@ -85,6 +87,12 @@ def set_logger(verbosity=False, error_log='pynfact.log',
         If the error log is set to ``/dev/null``, act in the same way as
         using the value "None" (case insensive), i.e., deactivate the
         warnings and errors log.
+
+    .. versionchanged:: 1.4.0
+        Add the ``queued`` argument.  If set, the logger only puts the
+        messages in a queue, and a :class:`logging.handlers.QueueListener`
+        writes them through the handlers in a background thread, so the
+        build never waits for a slow terminal or log file.
     """
     log_level = logging.DEBUG if verbosity else logging.INFO
     logger = logging.getLogger(__name__)
@@ -110,9 +118,57 @@ def set_logger(verbosity=False, error_log='pynfact.log',
             '%(asctime)s [%(levelname)s]: %(message)s'))
         logger.addHandler(warning_fhandler)
 
+    # Hand the messages to a thread writing them through the handlers,
+    # which writes all of them before the program exits
+    if queued:
+        import atexit
+        import queue
+        from logging.handlers import QueueHandler, QueueListener
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *logger.handlers,
+                                 respect_handler_level=True)
+        logger.handlers = [QueueHandler(log_queue)]
+        listener.start()
+        atexit.register(listener.stop)
+
     return logger
 
 
+def is_yes(value):
+    """Check if a configuration value means "yes".
+
+    YAML reads unquoted ``yes`` and ``no`` as booleans, but quoted
+    values are strings, so both are accepted.
+
+    :param value: Configuration value
+    :type value: str or bool
+    :return: ``True`` if the value is "yes" or "true" (case insensitive)
+    :rtype: bool
+
+    .. versionadded:: 1.4.0
+    """
+    return str(value).lower() in ('yes', 'true')
+
+
+def as_list(value):
+    """Read a configuration value that may be a list of values.
+
+    The value may be a YAML list, or a string of comma separated
+    values.  Every value is stripped of spaces around it.
+
+    :param value: Configuration value
+    :type value: str or list
+    :return: List of values as strings, empty if there is no value
+    :rtype: list
+
+    .. versionadded:: 1.4.0
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value or [] if str(item).strip()]
+
+
 def retrieve_config(config_file, logger=None):
     """Retrieve configuration from YAML file.
 
@@ -122,9 +178,59 @@ def retrieve_config(config_file, logger=None):
     :type logger: logging.Logger
     :return: Dictionary with the configuration written in YAML file
     :rtype: dict
+
+    .. versionchanged:: 1.4.0
+        The ``feed_format`` may be a list of formats.  The first one
+        is kept as ``feed_format``, and all of them in ``feed_formats``.
+
+    .. versionchanged:: 1.4.0
+        Add the ``build`` section, with the options of the build
+        process itself, such as ``streaming``.
+
+    .. versionchanged:: 1.4.0
+        Add ``ignore_patterns``, the source files to skip.
+
+    .. versionchanged:: 1.4.0
+        Add ``highlight_cache`` and ``highlight_cache_size``, where and
+        how much highlighted code to keep between builds.
+
+    .. versionchanged:: 1.4.0
+        Add ``markdown_backend``, the engine to parse Markdown.
+
+    .. versionchanged:: 1.4.0
+        Import :mod:`yaml` only when the configuration is read.
+
+    .. versionchanged:: 1.4.0
+        Add ``skip_unchanged``, to keep the fingerprints of the pages
+        and skip those that have not changed.
+
+    .. versionchanged:: 1.4.0
+        Add ``write_threads``, the threads writing the output files.
+
+    .. versionchanged:: 1.4.0
+        Add ``precompress``, to write compressed copies of the output.
+
+    .. versionchanged:: 1.4.0
+        Add ``minify_assets``, to minify the style sheets of the
+        templates.
+
+    .. versionchanged:: 1.4.0
+        Add ``minify_html``, to minify the generated pages.
+
+    .. versionchanged:: 1.4.0
+        Add ``image_widths`` and ``image_quality``, to resize the images
+        of the content, and ``image_cache_size``, how many resized
+        images to keep between builds.
     """
+    from pynfact.yamler import Yamler
+
     config = Yamler(config_file, logger)
 
+    # The feed format may be a single value, or a list of values, either
+    # as a YAML list or as a string of comma separated values
+    feed_formats = [feed_format.lower() for feed_format in
+                    as_list(config.retrieve('feed_format', "atom"))]
+
     site_config = {
         'uri': {
             'base': config.retrieve('base_uri', '').strip('/'),
@@ -151,13 +257,48 @@ def retrieve_config(config_file, logger=None):
             'comments': config.retrieve('comments').lower() == "yes",
             'default_category':
                 config.retrieve('default_category', "Miscellaneous"),
-            'feed_format': config.retrieve('feed_format', "atom").lower(),
+            'feed_format': feed_formats[0] if feed_formats else "none",
+            'feed_formats': feed_formats,
+            'feed_max_entries':
+                int(config.retrieve('feed_max_entries', 0)),
+            'feed_streaming':
+                is_yes(config.retrieve('feed_streaming', "no")),
+            'feed_topics': is_yes(config.retrieve('feed_topics', "no")),
             'max_entries': config.retrieve('max_entries', 10),
         },
         'dirs': {
             'deploy': "_build",
             'extra': config.retrieve('extra_dirs')
-        }
+        },
+        'build': {
+            'streaming': is_yes(config.retrieve('streaming_build', "no")),
+            'ignore_patterns':
+                as_list(config.retrieve('ignore_patterns', ".*")),
+            'highlight_cache':
+                '.pynfact_cache/highlight'
+                if is_yes(config.retrieve('highlight_cache', "no"))
+                else None,
+            'highlight_cache_size':
+                int(config.retrieve('highlight_cache_size', 32)) * 1024 * 1024,
+            'markdown_backend':
+                str(config.retrieve('markdown_backend',
+                                    "python-markdown")).lower(),
+            'fingerprints':
+                '.pynfact_cache/fingerprints.json'
+                if is_yes(config.retrieve('skip_unchanged', "no"))
+                else None,
+            'write_threads': int(config.retrieve('write_threads', 2)),
+            'precompress': is_yes(config.retrieve('precompress', "no")),
+            'minify_assets':
+                is_yes(config.retrieve('minify_assets', "yes")),
+            'minify_html': is_yes(config.retrieve('minify_html', "no")),
+            'image_widths':
+                [int(width) for width in
+                 as_list(config.retrieve('image_widths', []))],
+            'image_quality': int(config.retrieve('image_quality', 82)),
+            'image_cache_size':
+                int(config.retrieve('image_cache_size', 256)) * 1024 * 1024,
+        },
     }
 
     return site_config
@@ -188,12 +329,28 @@ def arg_init(logger, dst):
         sys.exit(11)
 
 
-def arg_build(logger, config_file='config.yml'):
-    """Build the static website after getting the site configuration.
+def new_builder(logger, config_file='config.yml', cache=None, stats=None,
+                tracer=None):
+    """Create a ``Builder`` after getting the site configuration.
 
     :param logger: Logger to pass it to the ``Builder`` constructor
     :type logger: logging.Logger
+    :param config_file: YAML configuration filename
+    :type config_file: str
+    :param cache: Parsed content cache to pass to the ``Builder``
+    :type cache: ContentCache
+    :param stats: Build statistics to pass to the ``Builder``
+    :type stats: BuildStats
+    :param tracer: Tracer to pass to the ``Builder``
+    :type tracer: Tracer
+    :return: Builder ready to generate the website
+    :rtype: Builder
+
+    .. versionadded:: 1.4.0
+        Split from :func:`arg_build`.
     """
+    from pynfact.builder import Builder
+
     site_config = retrieve_config(config_file, logger)
 
     template_values = {
@@ -202,14 +359,190 @@ def arg_build(logger, config_file='config.yml'):
             'base_uri': site_config['uri']['base'],
             'encoding': site_config['wlocale']['encoding'],
             'feed_format': site_config['presentation']['feed_format'],
+            'feed_topics': site_config['presentation']['feed_topics'],
             'lang': site_config['wlocale']['language'],
             'site_name': site_config['info']['site_name'],
             'page_links': [],
         }
     }
 
-    b = Builder(site_config, template_values, logger=logger)
-    b.gen_site()
+    return Builder(site_config, template_values, logger=logger,
+                   cache=cache, stats=stats, tracer=tracer)
+
+
+def arg_build(logger, config_file='config.yml', cache=None,
+              show_stats=False, stats_json=None, trace_file=None,
+              memprofile=False):
+    """Build the static website after getting the site configuration.
+
+    :param logger: Logger to pass it to the ``Builder`` constructor
+    :type logger: logging.Logger
+    :param config_file: YAML configuration filename
+    :type config_file: str
+    :param cache: Parsed content cache to pass to the ``Builder``
+    :type cache: ContentCache
+    :param show_stats: Log a report of the build statistics
+    :type show_stats: bool
+    :param stats_json: File where to write the build statistics
+    :type stats_json: str
+    :param trace_file: File where to write the trace of the build
+    :type trace_file: str
+    :param memprofile: Log the memory allocated in every build phase
+    :type memprofile: bool
+
+    .. versionchanged:: 1.4.0
+        Add the ``cache``, ``show_stats``, ``stats_json``,
+        ``trace_file`` and ``memprofile`` arguments.
+    """
+    from pynfact.stats import BuildStats
+    from pynfact.trace import Tracer
+
+    stats = BuildStats(memprofile=memprofile)
+    tracer = Tracer() if trace_file else None
+    new_builder(logger, config_file, cache, stats, tracer).gen_site()
+
+    if show_stats:
+        logger and logger.info("Build statistics:\n" + stats.report())
+    if memprofile:
+        logger and logger.info(
+            "Memory profile:\n" + stats.memory_report())
+    if stats_json:
+        try:
+            stats.write_json(stats_json)
+        except OSError:
+            logger and logger.error(
+                "Unable to write the build statistics")
+            sys.exit(12)
+    if tracer:
+        try:
+            tracer.write(trace_file)
+        except OSError:
+            logger and logger.error("Unable to write the build trace")
+            sys.exit(13)
+
+
+def arg_daemon(logger, socket_path='.pynfact.sock'):
+    """Start the build daemon and listen until interrupted or stopped.
+
+    :param logger: Logger to pass it to the ``Daemon`` constructor
+    :type logger: logging.Logger
+    :param socket_path: Unix domain socket where to listen
+    :type socket_path: str
+
+    .. versionadded:: 1.4.0
+    """
+    from pynfact.daemon import Daemon
+
+    Daemon(socket_path, logger=logger).serve()
+
+
+def arg_daemon_stop(logger, socket_path='.pynfact.sock'):
+    """Ask a running build daemon to stop.
+
+    :param logger: Logger where to write the messages of the daemon
+    :type logger: logging.Logger
+    :param socket_path: Unix domain socket where the daemon listens
+    :type socket_path: str
+
+    .. versionadded:: 1.4.0
+    """
+    from pynfact.daemon import request
+
+    request(socket_path, {'command': 'stop'}, logger=logger)
+    logger and logger.info("Build daemon stopped")
+
+
+def arg_build_via_daemon(logger, config_file='config.yml',
+                         socket_path='.pynfact.sock'):
+    """Ask a running build daemon to build the static website.
+
+    The log messages of the daemon are written to ``logger``, and the
+    program exits with the same status as the build.
+
+    :param logger: Logger where to write the messages of the daemon
+    :type logger: logging.Logger
+    :param config_file: YAML configuration filename
+    :type config_file: str
+    :param socket_path: Unix domain socket where the daemon listens
+    :type socket_path: str
+
+    .. versionadded:: 1.4.0
+    """
+    from pynfact.daemon import request
+
+    answer = request(socket_path,
+                     {'command': 'build', 'cwd': os.getcwd(),
+                      'config': config_file},
+                     logger=logger)
+    if 'elapsed' in answer:
+        logger and logger.info(
+            "Built by daemon in {:.3f} s".format(answer.get('elapsed')))
+    if answer.get('status'):
+        sys.exit(answer.get('status'))
+
+
+def arg_bench(logger, results_file=None, baseline_file=None,
+              tolerance=0.1, repeat=5, profile='small'):
+    """Run the end-to-end benchmarks, and compare them to a baseline.
+
+    The benchmarks are run on a synthetic website, as described in
+    :mod:`pynfact.bench`.  When comparing, the website is generated
+    with the same parameters as the baseline, and the program exits
+    with an error if any measure regresses beyond the tolerance.
+
+    :param logger: Logger where to write the results
+    :type logger: logging.Logger
+    :param results_file: File where to write the results as JSON
+    :type results_file: str
+    :param baseline_file: Results of a previous run to compare with
+    :type baseline_file: str
+    :param tolerance: Ratio allowed above the baseline
+    :type tolerance: float
+    :param repeat: Number of runs of every scenario
+    :type repeat: int
+    :param profile: Site profile when not comparing to a baseline
+    :type profile: str
+
+    .. versionadded:: 1.4.0
+    """
+    import json
+
+    from pynfact.bench.compare import compare, format_report
+    from pynfact.bench.scenarios import SCENARIOS, run_scenarios
+    from pynfact.bench.sitegen import PROFILES
+
+    baseline = None
+    params = {'posts': PROFILES.get(profile).get('posts')}
+    scenarios = SCENARIOS
+    if baseline_file:
+        try:
+            with open(baseline_file, encoding='utf-8') as f:
+                baseline = json.load(f)
+            params = baseline['params']
+            scenarios = tuple(baseline['runs'])
+        except (OSError, ValueError, KeyError, TypeError):
+            logger and logger.error("Unable to read the benchmark baseline")
+            sys.exit(82)
+
+    logger and logger.info(
+        "Running benchmarks on {} posts...".format(params.get('posts')))
+    results = run_scenarios(repeat=repeat, scenarios=scenarios, **params)
+
+    if results_file:
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    for scenario, summary in results.get('summary').items():
+        logger and logger.info("{}: {:.3f} s, {} KiB".format(
+            scenario, summary.get('wall'), summary.get('peak_rss_kb')))
+
+    if baseline:
+        report = compare(baseline, results, tolerance)
+        logger and logger.info("Comparison with the baseline:\n" +
+                               format_report(report))
+        if any(item.get('regression') for item in report):
+            logger and logger.error(
+                "Performance regression against the baseline")
+            sys.exit(81)
 
 
 def arg_serve(logger, host='localhost', port=4000):
@@ -217,6 +550,12 @@ def arg_serve(logger, host='localhost', port=4000):
 
     :param logger: Logger to pass it to the ``Server`` constructor
     :type logger: logging.Logger
+
+    .. versionchanged:: 1.4.0
+        Import the server only when serving, so the build modules are
+        never loaded just to serve the website.
     """
+    from pynfact.server import Server
+
     server = Server(host, port=port, path='_build', logger=logger)
     server.serve()
@@ -0,0 +1,226 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Long-lived build daemon listening on a Unix domain socket.
+
+The daemon keeps the Python modules, the Jinja2 environment and the
+parsed content cache in memory, so every build triggered through the
+socket avoids the start-up cost of a new process, and only parses again
+those source files that have changed.
+
+The protocol is line oriented: every message is a JSON object written
+in a single line.  The client sends one request, for example::
+
+    {"command": "build", "cwd": "/path/to/site", "config": "config.yml"}
+
+and the daemon answers with any number of log messages, followed by
+the final status of the request::
+
+    {"log": 20, "message": "Building static website..."}
+    {"status": 0, "elapsed": 0.42}
+
+The request ``{"command": "stop"}`` stops the daemon, as
+``pynfact --daemon-stop`` does.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import time
+
+from pynfact.cache import ContentCache
+
+
+class _StreamLogHandler(logging.Handler):
+    """Logging handler that writes every record to the client."""
+
+    def __init__(self, stream):
+        """Constructor.
+
+        :param stream: Writable binary stream connected to the client
+        :type stream: io.BufferedIOBase
+        """
+        super().__init__()
+        self.stream = stream
+
+    def emit(self, record):
+        """Send a log record to the client as a JSON line."""
+        try:
+            _send(self.stream, {'log': record.levelno,
+                                'message': record.getMessage()})
+        except OSError:
+            pass  # The client went away, but the build goes on
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle a single client request."""
+
+    def handle(self):
+        """Read the request, run it and write the final status."""
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+        except ValueError:
+            _send(self.wfile, {'status': 1, 'error': 'Malformed request'})
+            return
+
+        command = request.get('command')
+        if command == 'build':
+            start = time.perf_counter()
+            status = self.server.daemon.build(
+                request.get('cwd', os.getcwd()),
+                request.get('config', 'config.yml'),
+                _StreamLogHandler(self.wfile))
+            _send(self.wfile, {'status': status,
+                               'elapsed': time.perf_counter() - start})
+        elif command == 'stop':
+            _send(self.wfile, {'status': 0})
+            self.server.stopping = True
+        else:
+            _send(self.wfile, {'status': 1, 'error': 'Unknown command'})
+
+
+class Daemon:
+    """Build daemon.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, socket_path='.pynfact.sock', logger=None):
+        """Constructor.
+
+        :param socket_path: Unix domain socket where to listen
+        :type socket_path: str
+        :param logger: Logger where to store activity in
+        :type logger: logging.Logger
+        """
+        self.socket_path = os.path.abspath(socket_path)
+        self.logger = logger
+        self.cache = ContentCache()
+
+    def serve(self):
+        """Listen for build requests until interrupted or stopped.
+
+        :raise OSError: If the socket cannot be created
+        :raise KeyboardInterrupt: If the user stops the daemon (``^C``)
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            self.logger and self.logger.error(
+                "Unix domain sockets are not supported")
+            sys.exit(71)
+
+        self._remove_stale_socket()
+        try:
+            server = socketserver.UnixStreamServer(self.socket_path,
+                                                   _RequestHandler)
+        except OSError:
+            self.logger and self.logger.error(
+                "Unable to listen on the daemon socket")
+            sys.exit(71)
+        os.chmod(self.socket_path, 0o600)
+        server.daemon = self
+        server.stopping = False
+
+        self.logger and self.logger.info(
+            "Build daemon listening on {}".format(self.socket_path))
+        try:
+            while not server.stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            self.logger and self.logger.info("Interrupted!")
+        finally:
+            server.server_close()
+            os.path.exists(self.socket_path) and \
+                os.remove(self.socket_path)
+
+    def build(self, cwd, config_file, handler=None):
+        """Build a website keeping the cached content between builds.
+
+        :param cwd: Directory where the website is
+        :type cwd: str
+        :param config_file: Configuration file, relative to ``cwd``
+        :type config_file: str
+        :param handler: Log handler to attach during the build
+        :type handler: logging.Handler
+        :return: Exit status of the build
+        :rtype: int
+        """
+        from pynfact.cli import arg_build
+
+        old_cwd = os.getcwd()
+        self.logger and handler and self.logger.addHandler(handler)
+        try:
+            os.chdir(cwd)
+            arg_build(self.logger, config_file=config_file,
+                      cache=self.cache)
+            status = 0
+        except SystemExit as exc:
+            status = exc.code if isinstance(exc.code, int) else 1
+        except Exception as exc:
+            self.logger and self.logger.exception(
+                "Build failed: {}".format(exc))
+            status = 1
+        finally:
+            os.chdir(old_cwd)
+            self.logger and handler and self.logger.removeHandler(handler)
+
+        return status
+
+    def _remove_stale_socket(self):
+        """Remove the socket file if no daemon is listening on it."""
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                os.remove(self.socket_path)
+
+
+def request(socket_path, message, logger=None):
+    """Send a request to the daemon, and log its streamed answer.
+
+    Log messages sent by the daemon are passed to ``logger`` with their
+    original level.
+
+    :param socket_path: Unix domain socket where the daemon listens
+    :type socket_path: str
+    :param message: Request to send
+    :type message: dict
+    :param logger: Logger where to write the messages of the daemon
+    :type logger: logging.Logger
+    :return: Final status message sent by the daemon
+    :rtype: dict
+    :raise OSError: If it's not possible to connect to the daemon
+
+    .. versionadded:: 1.4.0
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    except (AttributeError, OSError):
+        logger and logger.error("Unable to connect to the build daemon")
+        sys.exit(72)
+
+    with sock, sock.makefile('rwb') as stream:
+        _send(stream, message)
+        for line in stream:
+            answer = json.loads(line.decode('utf-8'))
+            if 'status' in answer:
+                return answer
+            logger and logger.log(answer.get('log', logging.INFO),
+                                  answer.get('message'))
+
+    logger and logger.error("Unable to connect to the build daemon")
+    sys.exit(72)
+
+
+def _send(stream, message):
+    """Write a message to a stream as a single JSON line."""
+    stream.write(json.dumps(message).encode('utf-8') + b'\n')
+    stream.flush()
@@ -0,0 +1,194 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Syndication feeds selection and streaming writer.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import heapq
+from email.utils import format_datetime
+from xml.sax.saxutils import XMLGenerator
+
+from dateutil.parser import parse as dt_parse
+
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+
+
+def latest_entries(entries, max_entries=0, key=None):
+    """Select the newest entries, sorted chronologically descent.
+
+    When ``max_entries`` is set, only that number of entries is taken
+    by using a heap, instead of sorting all of them.
+
+    :param entries: Entries metadata, as in :func:`Meta.as_dict`
+    :type entries: iterable
+    :param max_entries: Maximum number of entries, or ``0`` for all
+    :type max_entries: int
+    :param key: Function to get the sorting date out of an entry, by
+        default its ``odate_idx`` value
+    :type key: callable
+    :return: The newest entries, newest first
+    :rtype: list
+    """
+    key = key or (lambda k: k.get('odate_idx'))
+    if max_entries and max_entries > 0:
+        return heapq.nlargest(max_entries, entries, key=key)
+    return sorted(entries, key=key, reverse=True)
+
+
+def parse_feed_date(date):
+    """Get a timezone aware ``datetime`` from an ISO 8601 string.
+
+    :param date: Date in ISO 8601 format, as in ``odate_html``
+    :type date: str
+    :return: Datetime object, or ``None`` if the date is empty
+    :rtype: datetime.datetime
+    """
+    return dt_parse(date) if date else None
+
+
+class StreamFeedWriter:
+    """Write a feed entry by entry, without building it in memory.
+
+    The ``info`` dictionary describes the feed itself, and contains the
+    keys ``id``, ``title``, ``subtitle``, ``description``, ``author``,
+    ``email``, ``link``, ``self_link``, ``language``, ``copyright`` and
+    ``updated`` (a ``datetime`` object).
+
+    Every entry is a dictionary with the keys ``id``, ``title``,
+    ``link``, ``author``, ``updated`` and ``published`` (``datetime``
+    objects), and the content is fetched only when the entry is written,
+    so no more than one entry content is kept in memory.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, filename, feed_format='atom', info=None,
+                 encoding='utf-8'):
+        """Constructor.
+
+        :param filename: Output file
+        :type filename: str
+        :param feed_format: Feed format string ('rss' or 'atom')
+        :type feed_format: str
+        :param info: Feed information
+        :type info: dict
+        :param encoding: Encoding of the output file
+        :type encoding: str
+        """
+        self.filename = filename
+        self.feed_format = feed_format.lower()
+        self.info = info or dict()
+        self.encoding = encoding
+
+    def write(self, entries, fetch_content):
+        """Write the feed.
+
+        :param entries: Feed entries, in the order they will be written
+        :type entries: iterable
+        :param fetch_content: Callable that returns the HTML content of
+            an entry, given the entry itself
+        :type fetch_content: callable
+        """
+        with open(self.filename, 'w', encoding=self.encoding) as f:
+            xml = XMLGenerator(f, self.encoding, short_empty_elements=True)
+            xml.startDocument()
+            if self.feed_format == 'rss':
+                self._write_rss(xml, entries, fetch_content)
+            else:
+                self._write_atom(xml, entries, fetch_content)
+            xml.endDocument()
+            f.write('\n')
+
+    def _write_atom(self, xml, entries, fetch_content):
+        """Write an Atom feed."""
+        info = self.info
+        attrs = {'xmlns': ATOM_NS}
+        if info.get('language'):
+            attrs['xml:lang'] = info.get('language')
+        xml.startElement('feed', attrs)
+        _element(xml, 'id', info.get('id'))
+        _element(xml, 'title', info.get('title'))
+        _element(xml, 'updated', _iso(info.get('updated')))
+        xml.startElement('author', {})
+        _element(xml, 'name', info.get('author'))
+        if info.get('email'):
+            _element(xml, 'email', info.get('email'))
+        xml.endElement('author')
+        _element(xml, 'link', attrs={'href': info.get('link'),
+                                     'rel': 'alternate'})
+        _element(xml, 'link', attrs={'href': info.get('self_link'),
+                                     'rel': 'self'})
+        if info.get('copyright'):
+            _element(xml, 'rights', info.get('copyright'))
+        if info.get('subtitle'):
+            _element(xml, 'subtitle', info.get('subtitle'))
+
+        for entry in entries:
+            xml.startElement('entry', {})
+            _element(xml, 'id', entry.get('id'))
+            _element(xml, 'title', entry.get('title'))
+            _element(xml, 'updated', _iso(entry.get('updated')))
+            xml.startElement('author', {})
+            _element(xml, 'name', entry.get('author'))
+            xml.endElement('author')
+            _element(xml, 'content', fetch_content(entry),
+                     attrs={'type': 'html'})
+            _element(xml, 'link', attrs={'href': entry.get('link'),
+                                         'rel': 'alternate'})
+            if entry.get('published'):
+                _element(xml, 'published', _iso(entry.get('published')))
+            xml.endElement('entry')
+
+        xml.endElement('feed')
+
+    def _write_rss(self, xml, entries, fetch_content):
+        """Write a RSS 2.0 feed."""
+        info = self.info
+        xml.startElement('rss', {'xmlns:atom': ATOM_NS, 'version': '2.0'})
+        xml.startElement('channel', {})
+        _element(xml, 'title', info.get('title'))
+        _element(xml, 'link', info.get('link'))
+        _element(xml, 'description', info.get('description'))
+        _element(xml, 'atom:link', attrs={'href': info.get('self_link'),
+                                          'rel': 'self'})
+        if info.get('copyright'):
+            _element(xml, 'copyright', info.get('copyright'))
+        if info.get('language'):
+            _element(xml, 'language', info.get('language'))
+        _element(xml, 'lastBuildDate', _rfc2822(info.get('updated')))
+
+        for entry in entries:
+            xml.startElement('item', {})
+            _element(xml, 'title', entry.get('title'))
+            _element(xml, 'link', entry.get('link'))
+            _element(xml, 'description', fetch_content(entry))
+            _element(xml, 'guid', entry.get('id'),
+                     attrs={'isPermaLink': 'false'})
+            if entry.get('published'):
+                _element(xml, 'pubDate', _rfc2822(entry.get('published')))
+            xml.endElement('item')
+
+        xml.endElement('channel')
+        xml.endElement('rss')
+
+
+def _element(xml, name, text=None, attrs=None):
+    """Write a whole XML element, with its text and attributes."""
+    xml.startElement(name, attrs or {})
+    if text:
+        xml.characters(text)
+    xml.endElement(name)
+
+
+def _iso(date):
+    """Format a datetime as in Atom feeds."""
+    return date.isoformat() if date else ''
+
+
+def _rfc2822(date):
+    """Format a datetime as in RSS feeds, independent of the locale."""
+    return format_datetime(date) if date else ''
@@ -5,11 +5,19 @@ File and path manipulation functions.
 :copyright: © 2012-2025, J. A. Corbal
 :license: MIT
 """
+import filecmp
+import fnmatch
 import os
 
 from pynfact.struri import slugify, strip_html_tags
 
 
+# Valid extensions of every markup language, in lowercase
+MD_EXTENSIONS = frozenset(('.md', '.mdown', '.mkdn', '.mmd', '.markdown'))
+RST_EXTENSIONS = frozenset(('.rst', '.rest', '.rtext'))
+MD_RST_EXTENSIONS = MD_EXTENSIONS | RST_EXTENSIONS
+
+
 def has_extension(filename, extension, case_sensitive=False):
     """Test if the filename has a extension in particular.
 
@@ -85,9 +93,10 @@ def has_extension_md(filename):
     >>> has_extension_md('filename.rst')
     False
 
+    .. versionchanged:: 1.4.0
+        Test against the precomputed :data:`MD_EXTENSIONS`.
     """
-    return has_extensions(filename,
-                          ['.md', '.mdown', '.mkdn', '.mmd', '.markdown'])
+    return os.path.splitext(filename)[1].lower() in MD_EXTENSIONS
 
 
 def has_extension_rst(filename):
@@ -104,8 +113,10 @@ def has_extension_rst(filename):
     >>> has_extension_rst('filename.reSt')
     True
 
+    .. versionchanged:: 1.4.0
+        Test against the precomputed :data:`RST_EXTENSIONS`.
     """
-    return has_extensions(filename, ['.rst', '.rest', '.rtext'])
+    return os.path.splitext(filename)[1].lower() in RST_EXTENSIONS
 
 
 def has_extension_md_rst(filename):
@@ -121,8 +132,61 @@ def has_extension_md_rst(filename):
 
     >>> has_extension_md_rst('filename.txt')
     False
+
+    .. versionchanged:: 1.4.0
+        Test against the precomputed :data:`MD_RST_EXTENSIONS`.
+    """
+    return os.path.splitext(filename)[1].lower() in MD_RST_EXTENSIONS
+
+
+def scan_sources(directory, ignore_patterns=(), extensions=MD_RST_EXTENSIONS):
+    """Find the source files in a directory and its subdirectories.
+
+    The directory is walked with :func:`os.scandir`, so the type of
+    every entry comes from the directory listing itself, and its status
+    is retrieved at most once.  Files and directories whose name, or
+    path relative to ``directory``, match any of the ``ignore_patterns``
+    (shell-style, as in :mod:`fnmatch`) are skipped, and so are the
+    symbolic links to directories, to avoid loops.
+
+    :param directory: Directory where to look for source files
+    :type directory: str
+    :param ignore_patterns: Patterns of the names to skip
+    :type ignore_patterns: list
+    :param extensions: Valid extensions, in lowercase
+    :type extensions: frozenset
+    :return: Path of every source file relative to ``directory``, in
+        alphabetical order, and its :func:`os.stat` result
+    :rtype: list
+
+    :Example:
+
+    >>> [path for path, st in scan_sources('posts', ['.*', 'drafts'])]
+    ['2024/first.md', '2024/second.rst', 'third.md']
+
+    .. versionadded:: 1.4.0
     """
-    return has_extension_md(filename) or has_extension_rst(filename)
+    def ignored(name, path):
+        return any(fnmatch.fnmatchcase(name, pattern) or
+                   fnmatch.fnmatchcase(path, pattern)
+                   for pattern in ignore_patterns)
+
+    sources = []
+    pending = ['']
+    while pending:
+        subdir = pending.pop()
+        with os.scandir(os.path.join(directory, subdir)) as it:
+            for entry in it:
+                path = os.path.join(subdir, entry.name)
+                if ignored(entry.name, path):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(path)
+                elif os.path.splitext(entry.name)[1].lower() in extensions \
+                        and entry.is_file():
+                    sources.append((path, entry.stat()))
+
+    return sorted(sources, key=lambda source: source[0])
 
 
 def link_to(name, prefix='', makedirs=True, justdir=False,
@@ -168,3 +232,64 @@ def link_to(name, prefix='', makedirs=True, justdir=False,
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
     return os.path.dirname(path) if justdir else path
+
+
+def replace_if_changed(tmp_path, path):
+    """Move a file to its destination only if the content is different.
+
+    If the destination has the same content, it's left untouched (along
+    with its modification time), and the temporary file is removed.
+    Otherwise, the temporary file atomically replaces the destination.
+
+    :param tmp_path: Newly written file
+    :type tmp_path: str
+    :param path: Destination file
+    :type path: str
+    :return: ``True`` if the destination has been updated
+    :rtype: bool
+
+    .. versionadded:: 1.4.0
+    """
+    try:
+        same = os.path.exists(path) and \
+            filecmp.cmp(tmp_path, path, shallow=False)
+    finally:
+        filecmp.clear_cache()
+
+    if same:
+        os.remove(tmp_path)
+        return False
+
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_if_changed(path, data):
+    """Write a file only if its content is different.
+
+    The new content is compared in memory with the current one, so an
+    unchanged file is only read, and left untouched (along with its
+    modification time).  Otherwise, the content is written to a
+    temporary file, ended in ``~``, that atomically replaces the file.
+
+    :param path: Destination file
+    :type path: str
+    :param data: New content of the file
+    :type data: bytes
+    :return: ``True`` if the file has been updated
+    :rtype: bool
+
+    .. versionadded:: 1.4.0
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+
+    with open(path + '~', 'wb') as f:
+        f.write(data)
+    os.replace(path + '~', path)
+    return True
@@ -0,0 +1,106 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Cache of template fragments rendered once per build.
+
+The listing pages (home pages, categories, tags, archive...) render the
+same summary of every entry again and again: once in every page that
+lists it.  The ``{% cache %}`` tag keeps the HTML of a fragment the
+first time it's rendered, and reuses it wherever the same key is found
+again during the build::
+
+    {%- for entry in entries %}
+    {%- cache 'entry-overview', entry.uri, entry.odate %}
+    <div class="entry-overview">...</div>
+    {%- endcache %}
+    {%- endfor %}
+
+The key is made of every expression after ``cache``, and it must
+identify everything the fragment depends on (other than the entry
+itself, such as its URI, which may be relative or absolute, and its
+formatted date); a name for the fragment as the first expression avoids
+mixing the fragments of different templates.  The fragments are
+forgotten at the beginning of every build, so they never outlive the
+content they were rendered from.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """Rendered fragments by key.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.fragments = dict()
+        self.clear()
+
+    def clear(self):
+        """Forget all the fragments, and count again from zero."""
+        self.fragments.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, producer):
+        """Get a fragment, or render it and keep it if it's not there.
+
+        :param key: Key of the fragment, which must be hashable
+        :type key: tuple
+        :param producer: Callable without arguments rendering the
+            fragment
+        :type producer: callable
+        :return: The cached or newly rendered fragment
+        :rtype: str
+        """
+        try:
+            fragment = self.fragments[key]
+        except KeyError:
+            self.misses += 1
+            fragment = self.fragments[key] = producer()
+        else:
+            self.hits += 1
+        return fragment
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja2 extension adding the ``{% cache key, ... %}`` tag.
+
+    The fragments are kept in the :class:`FragmentCache` of the
+    environment, ``environment.fragment_cache``.
+
+    .. versionadded:: 1.4.0
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        """Constructor.
+
+        :param environment: Environment using the extension
+        :type environment: jinja2.Environment
+        """
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        """Parse the ``cache`` tag, up to its ``endcache``."""
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+
+        call = self.call_method('_cached_fragment',
+                                [nodes.Tuple(key, 'load')])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cached_fragment(self, key, caller):
+        """Get the fragment of a key, rendering it with ``caller``."""
+        return self.environment.fragment_cache.get(key, caller)
@@ -0,0 +1,204 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Cache of the syntax highlighting of code blocks.
+
+Highlighting code with Pygments takes most of the time needed to parse
+a document with code, and the same snippets usually appear in many
+documents, and in every build.  Both parsers highlight the code through
+this cache:
+
+* Markdown, with the :class:`parsermd.HighlightCacheExtension`, which
+  keeps the HTML of every code block highlighted by the ``codehilite``
+  extension (fenced code blocks included).
+* reStructuredText, with its own ``code`` directive,
+  :class:`parserrst.CachedCodeBlock`, which keeps the tokens of every
+  code block.
+
+Python-Markdown is not changed, so any other use of it in the same
+process is not affected; the ``code`` directive is registered in
+docutils as any other directive defined by an application.
+
+Every value is identified by the code, its language, the highlighting
+options, and the version of Pygments, so it's never stale.  The values
+are kept in memory, and optionally in a directory, so they are reused
+by the next builds.  That directory is limited in size by removing the
+least recently used values at the end of the build.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import collections
+import hashlib
+import json
+import os
+import tempfile
+
+import pygments
+
+
+class HighlightCache:
+    """Keep the highlighted code blocks in memory and, optionally, on disk.
+
+    The memory holds up to ``max_entries`` values, dropping the least
+    recently used.  When a ``directory`` is set, every value is also
+    stored there in its own file, and found there by later builds;
+    :func:`prune` keeps that directory under ``max_bytes``.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, directory=None, max_bytes=32 * 1024 * 1024,
+                 max_entries=4096):
+        """Constructor.
+
+        :param directory: Directory where to store the values, if any
+        :type directory: str
+        :param max_bytes: Maximum size of the directory, in bytes
+        :type max_bytes: int
+        :param max_entries: Maximum number of values kept in memory
+        :type max_entries: int
+        """
+        self.values = collections.OrderedDict()
+        self.max_entries = max_entries
+        self.configure(directory, max_bytes)
+
+    def configure(self, directory=None, max_bytes=32 * 1024 * 1024):
+        """Set the directory where to store the values.
+
+        The values in memory are kept, but the hits and misses are
+        counted again from zero.
+
+        :param directory: Directory where to store the values, if any
+        :type directory: str
+        :param max_bytes: Maximum size of the directory, in bytes
+        :type max_bytes: int
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Forget the values in memory, but not those in the directory."""
+        self.values.clear()
+
+    @staticmethod
+    def key(kind, *parts):
+        """Compute the key of a value.
+
+        :param kind: Kind of value, such as "html" or "tokens"
+        :type kind: str
+        :param parts: Everything the value depends on, in a ``repr``
+            that does not change between processes
+        :return: Hexadecimal digest
+        :rtype: str
+        """
+        digest = hashlib.sha1(kind.encode('utf-8'))
+        digest.update(pygments.__version__.encode('utf-8'))
+        for part in parts:
+            digest.update(b'\0' + repr(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key, producer):
+        """Get a value, or produce it and keep it if it's not there.
+
+        :param key: Key of the value, as in :func:`key`
+        :type key: str
+        :param producer: Callable without arguments computing the value,
+            which must be serializable as JSON
+        :type producer: callable
+        :return: The cached or newly produced value
+        """
+        if key in self.values:
+            self.values.move_to_end(key)
+            self.hits += 1
+            return self.values[key]
+
+        value = self._load(key)
+        if value is None:
+            self.misses += 1
+            value = producer()
+            self._store(key, value)
+        else:
+            self.hits += 1
+
+        self.values[key] = value
+        if len(self.values) > self.max_entries:
+            self.values.popitem(last=False)
+        return value
+
+    def prune(self):
+        """Remove the least recently used values from the directory.
+
+        :return: Number of values removed
+        :rtype: int
+        """
+        if not self.directory or not os.path.isdir(self.directory):
+            return 0
+
+        with os.scandir(self.directory) as it:
+            files = [(entry.stat().st_mtime_ns, entry.stat().st_size,
+                      entry.path) for entry in it if entry.is_file()]
+
+        removed = 0
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        return removed
+
+    def _load(self, key):
+        """Read a value from the directory, marking it as used.
+
+        :param key: Key of the value
+        :type key: str
+        :return: The value, or ``None`` if it's not there
+        """
+        if not self.directory:
+            return None
+
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def _store(self, key, value):
+        """Write a value to the directory, if any.
+
+        The value is written to a temporary file first, so another
+        build never reads it half written.  Any error is ignored, since
+        the value can always be produced again.
+
+        :param key: Key of the value
+        :type key: str
+        :param value: Value serializable as JSON
+        """
+        if not self.directory:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory,
+                                            prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, os.path.join(self.directory, key))
+        except OSError:
+            pass
+
+
+# Cache shared by all the parsers of the process
+HIGHLIGHT_CACHE = HighlightCache()
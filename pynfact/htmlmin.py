@@ -0,0 +1,117 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Minification of the generated HTML pages.
+
+The templates are indented to be read, and commented, so every page
+carries much white space and many comments that the browsers ignore.
+:func:`minify_html` removes them, page by page, right after rendering:
+
+* Comments are removed, but the conditional ones (``<!--[if IE]>``).
+* Every run of white space is reduced to a single character, a new line
+  if the run had one, or a space otherwise, which the browsers show in
+  the same way.  So the minified HTML is as the original to the eye.
+* The content of ``pre``, ``textarea``, ``script`` and ``style``
+  elements, and of inline ``code`` elements, is kept as it is.
+* The values of the attributes are kept as they are, but the white
+  space between them is reduced as in the text.
+
+It's a single pass of a regular expression over every page, without
+parsing it, so it adds little to the time to render it.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import re
+
+
+# Elements whose content is kept as it is
+PRESERVED_ELEMENTS = ('code', 'pre', 'script', 'style', 'textarea')
+
+# Tokens of a page: preserved elements, comments, tags and text
+HTML_TOKEN_RE = re.compile(
+    r'(<(?P<preserved>{})\b.*?</(?P=preserved)\s*>'
+    r'|<!--.*?-->'
+    r'|<[^>]*>)'.format('|'.join(PRESERVED_ELEMENTS)),
+    re.DOTALL | re.IGNORECASE)
+
+# Quoted values of the attributes of a tag
+ATTRIBUTE_VALUE_RE = re.compile(r'("[^"]*"|\'[^\']*\')')
+
+# Runs of white space, with a new line or not
+NEWLINE_SPACE_RE = re.compile(r'[ \t\r\f\v]*\n\s*')
+SPACE_RE = re.compile(r'[ \t\r\f\v]{2,}')
+
+
+def collapse_spaces(text):
+    """Reduce every run of white space to a single character.
+
+    :param text: Text, without preserved elements
+    :type text: str
+    :return: Text with a new line or a space for every run
+    :rtype: str
+
+    :Example:
+
+    >>> collapse_spaces('  a\\n\\n    b   c ')
+    ' a\\nb c '
+    """
+    return SPACE_RE.sub(' ', NEWLINE_SPACE_RE.sub('\n', text))
+
+
+def minify_tag(tag):
+    """Reduce the white space of a tag, but in its attribute values.
+
+    :param tag: Tag, from ``<`` to ``>``
+    :type tag: str
+    :return: Minified tag
+    :rtype: str
+
+    :Example:
+
+    >>> minify_tag('<a href="x.html"\\n   title="a  b">')
+    '<a href="x.html"\\ntitle="a  b">'
+    """
+    if '"' not in tag and "'" not in tag:
+        return collapse_spaces(tag)
+
+    parts = ATTRIBUTE_VALUE_RE.split(tag)
+    for index in range(0, len(parts), 2):
+        parts[index] = collapse_spaces(parts[index])
+    return ''.join(parts)
+
+
+def minify_html(html):
+    """Minify a page.
+
+    :param html: HTML page
+    :type html: str
+    :return: Minified page
+    :rtype: str
+
+    :Example:
+
+    >>> minify_html('<p>\\n  <!-- A -->\\n  <pre>  x\\n  y</pre>\\n</p>')
+    '<p>\\n<pre>  x\\n  y</pre>\\n</p>'
+    """
+    parts = HTML_TOKEN_RE.split(html)
+
+    # Every match is split in the whole token and the preserved element
+    # name, if any: text, token, name, text, token, name... text.  The
+    # text around a removed comment is joined before reducing its white
+    # space, so it's reduced as a single run
+    out = []
+    text = parts[0]
+    for index in range(1, len(parts), 3):
+        token, preserved = parts[index], parts[index + 1]
+        if preserved is None and token.startswith('<!--') and \
+                not token.startswith(('<!--[if', '<!--<!')):
+            text += parts[index + 2]
+            continue
+        out.append(collapse_spaces(text))
+        out.append(token if preserved is not None else minify_tag(token))
+        text = parts[index + 2]
+    out.append(collapse_spaces(text))
+
+    return ''.join(out)
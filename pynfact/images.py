@@ -0,0 +1,474 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Responsive images, resized to the widths given in the configuration.
+
+The entries and pages embed their images at full resolution, as they
+are in ``static`` or in the extra directories.  If ``image_widths`` is
+set, every image embedded in the HTML of an entry or a page, such as
+``media/photo.jpg``, gets a smaller copy (a *derivative*) for every one
+of those widths below its own, next to it in the website, such as
+``media/photo.480w.jpg``, and its ``<img>`` tag is rewritten to let the
+browser choose among them::
+
+    <img alt="A photo" src="/media/photo.jpg"
+         srcset="/media/photo.480w.jpg 480w, /media/photo.jpg 1600w"
+         width="1600" height="1200" loading="lazy" />
+
+Resizing and encoding the images is, by far, the slowest part of a
+build, so:
+
+* The derivatives are kept in a cache directory, named after the digest
+  of the original image and the parameters used to make them, so the
+  same image is never resized twice, even if it's renamed or moved.
+* The digest and size of every original image are kept in a manifest,
+  and only read again if the image file has changed.
+* The cache directory is kept below a maximum size, removing the
+  derivatives not used by the build, the least recently used first.
+* The derivatives of the previous build not made again, such as those
+  of an image removed from the content, are removed from the website.
+* The derivatives missing from the cache are made in parallel, by a
+  pool of processes, started with ``spawn``: forking a builder with
+  threads running (such as the writers) is not safe.
+
+It needs Pillow, an optional dependency (``pip install pynfact[images]``),
+only imported when there are images to read.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import concurrent.futures
+import filecmp
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from urllib.parse import urlsplit, unquote
+
+from pynfact.trace import NULL_TRACER, Tracer
+
+
+# Extensions of the images to resize, in lowercase, and their formats
+IMAGE_FORMATS = {
+    '.jpeg': 'JPEG',
+    '.jpg': 'JPEG',
+    '.png': 'PNG',
+    '.webp': 'WEBP',
+}
+
+# Image tags, and their attributes
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+IMG_SRC_RE = re.compile(
+    r'''\ssrc\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+IMG_SIZED_RE = re.compile(r'\s(?:srcset|width|height)\s*=', re.IGNORECASE)
+IMG_LOADING_RE = re.compile(r'\sloading\s*=', re.IGNORECASE)
+
+# EXIF orientations with the width and the height swapped
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def derivative_name(path, width):
+    """Get the name of the derivative of an image at a width.
+
+    :param path: Name or URL of the original image
+    :type path: str
+    :param width: Width of the derivative, in pixels
+    :type width: int
+    :return: Name or URL of the derivative
+    :rtype: str
+
+    :Example:
+
+    >>> derivative_name('/media/photo.jpg', 480)
+    '/media/photo.480w.jpg'
+    """
+    root, ext = os.path.splitext(path)
+    return '{}.{}w{}'.format(root, width, ext)
+
+
+def read_image(path):
+    """Read the digest and the size of an image.
+
+    The size is the one the image is shown with, so the width and the
+    height are swapped if the image is rotated by its EXIF orientation.
+    Only the header of the image is read by Pillow.
+
+    :param path: Image file
+    :type path: str
+    :return: Hexadecimal digest of the file, and width and height
+    :rtype: tuple
+    """
+    from PIL import Image
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+    return digest, width, height
+
+
+def resize_image(src, dst, width, quality=82):
+    """Write a derivative of an image, resized to a width.
+
+    The image is rotated by its EXIF orientation, and the derivative
+    keeps its color profile, but not the rest of its metadata.  It's
+    written to a temporary file first, so it's never left half written.
+    It runs in a separate process, so it only takes and returns values
+    that can be pickled.
+
+    :param src: Original image
+    :type src: str
+    :param dst: Derivative image, with the extension of the original
+    :type dst: str
+    :param width: Width of the derivative, in pixels
+    :type width: int
+    :param quality: Quality of the lossy formats, from 1 to 100
+    :type quality: int
+    :return: Size of the derivative, in bytes
+    :rtype: int
+    """
+    from PIL import Image, ImageOps
+
+    image_format = IMAGE_FORMATS.get(os.path.splitext(dst)[1].lower())
+    with Image.open(src) as image:
+        icc_profile = image.info.get('icc_profile')
+        image = ImageOps.exif_transpose(image)
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+
+        options = {'optimize': True}
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        if image_format == 'JPEG':
+            options.update(quality=quality, progressive=True)
+            if image.mode not in ('RGB', 'L', 'CMYK'):
+                image = image.convert('RGB')
+        elif image_format == 'WEBP':
+            options.update(quality=quality)
+
+        tmp_path = dst + '~'
+        try:
+            image.save(tmp_path, image_format, **options)
+            os.replace(tmp_path, dst)
+        except BaseException:
+            os.path.exists(tmp_path) and os.remove(tmp_path)
+            raise
+
+    return os.path.getsize(dst)
+
+
+def resize_image_traced(src, dst, width, quality=82):
+    """Write a derivative of an image, recording a trace of it.
+
+    The trace is recorded by a tracer of the process resizing the
+    image, so its events are returned along with the size, to be added
+    to the trace of the build.
+
+    :param src: Original image
+    :type src: str
+    :param dst: Derivative image, with the extension of the original
+    :type dst: str
+    :param width: Width of the derivative, in pixels
+    :type width: int
+    :param quality: Quality of the lossy formats, from 1 to 100
+    :type quality: int
+    :return: Size of the derivative, in bytes, and events of the trace
+    :rtype: tuple
+
+    .. seealso:: :func:`resize_image`
+    """
+    tracer = Tracer()
+    with tracer.span('resize', 'images', file=src, width=width):
+        size = resize_image(src, dst, width, quality)
+    return size, tracer.events
+
+
+class ImagePipeline:
+    """Responsive images of the HTML content of a build.
+
+    The ``<img>`` tags are rewritten by :func:`rewrite`, while the
+    content is parsed, which also finds the derivatives needed by every
+    image; they are made and copied to the website later on, all
+    together, by :func:`generate`.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, widths, source_dirs, deploy_dir, base_uri='',
+                 quality=82, cache_dir='.pynfact_cache/images',
+                 processes=None, max_bytes=256 * 1024 * 1024):
+        """Constructor.
+
+        :param widths: Widths of the derivatives, in pixels
+        :type widths: list
+        :param source_dirs: Directories whose images may be resized,
+            such as ``static``, relative to the website root
+        :type source_dirs: list
+        :param deploy_dir: Directory of the website
+        :type deploy_dir: str
+        :param base_uri: Base URI of the website, without slashes
+        :type base_uri: str
+        :param quality: Quality of the lossy formats, from 1 to 100
+        :type quality: int
+        :param cache_dir: Directory of the derivatives, and of the
+            manifest of the original images
+        :type cache_dir: str
+        :param processes: Number of processes resizing the images, by
+            default one per CPU
+        :type processes: int
+        :param max_bytes: Maximum size of the cache directory, in bytes
+        :type max_bytes: int
+        """
+        self.widths = sorted(set(widths))
+        self.source_dirs = [os.path.normpath(directory)
+                            for directory in source_dirs]
+        self.deploy_dir = deploy_dir
+        self.base_uri = base_uri.strip('/')
+        self.quality = quality
+        self.cache_dir = cache_dir
+        self.processes = processes
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.manifest, self.previous_outputs = self._load()
+        self.images = dict()
+        self.derivatives = dict()
+
+    def rewrite(self, content):
+        """Add the derivatives and the size of the images of some HTML.
+
+        Only the images in the source directories are rewritten, and
+        only the attributes not already in their tags are added.
+
+        :param content: HTML content of an entry or a page
+        :type content: str
+        :return: HTML content with the ``<img>`` tags rewritten
+        :rtype: str
+        """
+        if '<img' not in content and '<IMG' not in content:
+            return content
+        return IMG_TAG_RE.sub(self._rewrite_tag, content)
+
+    def generate(self, logger=None, tracer=NULL_TRACER):
+        """Make the missing derivatives, and copy them to the website.
+
+        :param logger: Logger where to store activity in
+        :type logger: logging.Logger
+        :param tracer: Tracer of the resizing and the copies
+        :type tracer: Tracer
+        :return: Derivatives resized, copied, and unchanged, bytes
+            copied, and derivatives of the previous build removed
+        :rtype: tuple
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        missing = sorted({(src, cached, width)
+                          for src, cached, width in self.derivatives.values()
+                          if not os.path.exists(cached)})
+        if missing:
+            processes = self.processes or os.cpu_count() or 1
+            with tracer.span('resize', 'images', images=len(missing)), \
+                    concurrent.futures.ProcessPoolExecutor(
+                        min(processes, len(missing)),
+                        mp_context=multiprocessing.get_context('spawn')) \
+                    as executor:
+                if tracer.enabled:
+                    for size, events in executor.map(
+                            resize_image_traced, *zip(*missing),
+                            [self.quality] * len(missing)):
+                        tracer.merge(events)
+                else:
+                    list(executor.map(resize_image,
+                                      *zip(*missing),
+                                      [self.quality] * len(missing)))
+
+        copied = unchanged = copied_bytes = 0
+        with tracer.span('copy', 'images', images=len(self.derivatives)):
+            for output, (src, cached, width) in \
+                    sorted(self.derivatives.items()):
+                os.utime(cached)  # Used, so not pruned from the cache
+                if os.path.exists(output) and filecmp.cmp(cached, output):
+                    unchanged += 1
+                    continue
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                shutil.copy2(cached, output)
+                copied += 1
+                copied_bytes += os.path.getsize(output)
+                logger and logger.debug(
+                    'Updated content of: "{}"'.format(output))
+
+        removed = self._remove_stale(logger)
+        self._prune()
+        self._save()
+        return len(missing), copied, unchanged, copied_bytes, removed
+
+    def _rewrite_tag(self, match):
+        """Rewrite an ``<img>`` tag, if its image is found."""
+        tag = match.group(0)
+        src = IMG_SRC_RE.search(tag)
+        if not src or IMG_SIZED_RE.search(tag):
+            return tag
+        url = next(group for group in src.groups() if group is not None)
+        path = self._source_path(html.unescape(url))
+        if not path:
+            return tag
+
+        try:
+            digest, width, height = self._image(path)
+        except OSError:
+            return tag
+
+        candidates = []
+        ext = os.path.splitext(path)[1]
+        for derivative_width in self.widths:
+            if derivative_width >= width:
+                break
+            output = os.path.join(self.deploy_dir,
+                                  derivative_name(path, derivative_width))
+            cached = os.path.join(self.cache_dir, '{}.{}w.q{}{}'.format(
+                digest, derivative_width, self.quality, ext.lower()))
+            self.derivatives[output] = (path, cached, derivative_width)
+            candidates.append('{} {}w'.format(
+                derivative_name(url, derivative_width), derivative_width))
+        candidates.append('{} {}w'.format(url, width))
+
+        attributes = ' width="{}" height="{}"'.format(width, height)
+        if len(candidates) > 1:
+            attributes = ' srcset="{}"'.format(', '.join(candidates)) + \
+                attributes
+        if not IMG_LOADING_RE.search(tag):
+            attributes += ' loading="lazy"'
+        end = len(tag) - 2 if tag.endswith('/>') else len(tag) - 1
+        return tag[:end].rstrip() + attributes + \
+            (' ' if tag[end:] == '/>' else '') + tag[end:]
+
+    def _source_path(self, url):
+        """Find the file of an image URL, if it's in a source directory.
+
+        :param url: URL of the image, as in its ``<img>`` tag
+        :type url: str
+        :return: File of the image, relative to the website root, or
+            ``None`` if it's not an image of the website to resize
+        :rtype: str
+        """
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or \
+                os.path.splitext(parts.path)[1].lower() not in IMAGE_FORMATS:
+            return None
+
+        path = unquote(parts.path).lstrip('/')
+        if self.base_uri and path.startswith(self.base_uri + '/'):
+            path = path[len(self.base_uri) + 1:]
+        path = os.path.normpath(path)
+        if path.split(os.sep)[0] not in self.source_dirs or \
+                not os.path.isfile(path):
+            return None
+        return path
+
+    def _image(self, path):
+        """Get the digest and size of an image, from the manifest.
+
+        The image is read only if it's not in the manifest, or if its
+        file has changed since.
+        """
+        if path not in self.images:
+            st = os.stat(path)
+            signature = [st.st_size, st.st_mtime_ns]
+            info = self.manifest.get(path)
+            if not info or info[0] != signature:
+                info = [signature] + list(read_image(path))
+            self.images[path] = info
+        return tuple(self.images[path][1:])
+
+    def _remove_stale(self, logger=None):
+        """Remove the derivatives of the previous build not made again.
+
+        :param logger: Logger where to store activity in
+        :type logger: logging.Logger
+        :return: Number of derivatives removed
+        :rtype: int
+        """
+        removed = 0
+        for output in self.previous_outputs:
+            if output in self.derivatives:
+                continue
+            try:
+                os.remove(output)
+            except OSError:
+                continue
+            removed += 1
+            logger and logger.debug(
+                'Removed stale image: "{}"'.format(output))
+        return removed
+
+    def _prune(self):
+        """Keep the cache directory below its maximum size.
+
+        The derivatives used by this build are never removed; the rest,
+        the least recently used first, only while the directory is over
+        its maximum size.
+
+        :return: Number of derivatives removed
+        :rtype: int
+        """
+        used = {cached for src, cached, width in self.derivatives.values()}
+        with os.scandir(self.cache_dir) as it:
+            files = [(entry.stat().st_mtime_ns, entry.stat().st_size,
+                      entry.path) for entry in it if entry.is_file()
+                     and os.path.splitext(entry.name)[1] in IMAGE_FORMATS]
+
+        removed = 0
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path in used:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        return removed
+
+    def _load(self):
+        """Read the manifest of the previous build, if any.
+
+        :return: Digest and size of the original images, and
+            derivatives written to the website
+        :rtype: tuple
+        """
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            images = manifest['images']
+            outputs = manifest['outputs']
+        except (OSError, ValueError, KeyError, TypeError):
+            return dict(), []
+        return (images, outputs) \
+            if isinstance(images, dict) and isinstance(outputs, list) \
+            else (dict(), [])
+
+    def _save(self):
+        """Write the manifest of the images of this build.
+
+        Any error is ignored, since the only effect is that the images
+        are read again in the next build.
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir,
+                                            prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'images': self.images,
+                           'outputs': sorted(self.derivatives)},
+                          f, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            pass
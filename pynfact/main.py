@@ -9,19 +9,34 @@ Main entry point.
 import argparse
 import sys
 
-from pynfact.cli import arg_build, arg_init, arg_serve, set_logger
+from pynfact.cli import (arg_bench, arg_build, arg_build_via_daemon,
+                         arg_daemon, arg_daemon_stop, arg_init, arg_serve,
+                         set_logger)
 
 
 # This program version
 __version__ = "1.3.6"
 
 
+def colored_excepthook(*exc_info):
+    """Print a traceback with colors, if ``colored_traceback`` exists.
+
+    The module (and :mod:`pygments`) is only imported when there is a
+    traceback to print, so it does not slow down the start of the
+    program.
+
+    .. versionadded:: 1.4.0
+    """
+    try:
+        import colored_traceback
+        colored_traceback.add_hook(always=True)
+    except ImportError:
+        sys.excepthook = sys.__excepthook__
+    sys.excepthook(*exc_info)
+
+
 # Attempts to enable colored tracebacks for better error readability
-try:
-    import colored_traceback.auto
-    colored_traceback.add_hook(always=True)
-except ImportError:
-    pass
+sys.excepthook = colored_excepthook
 
 
 def main():
@@ -45,6 +60,23 @@ def main():
 
     .. versionchanged: 1.3.5
         Fix ``--serve`` without argument, and added ``--version``.
+
+    .. versionchanged: 1.4.0
+        Add ``--daemon`` to start a long-lived build daemon,
+        ``--via-daemon`` to build through it, and ``--daemon-stop`` to
+        stop it.
+
+    .. versionchanged: 1.4.0
+        Add ``--stats`` and ``--stats-json`` to report the build
+        statistics, ``--trace`` to write a trace of the build, and
+        ``--memprofile`` to report the memory used in every phase.
+
+    .. versionchanged: 1.4.0
+        Add ``--bench`` to run the benchmarks, and ``--compare`` to
+        compare them with a baseline.
+
+    .. versionchanged: 1.4.0
+        Write the log messages in a background thread.
     """
     parser = argparse.ArgumentParser(description=""
                                      "PynFact!: "
@@ -61,6 +93,13 @@ def main():
                         help="initialize a new website structure")
     rgroup.add_argument('-b', '--build', action='store_true',
                         help="parse input files and build the website")
+    rgroup.add_argument('-d', '--daemon', action='store_true',
+                        help="keep running and build on request")
+    rgroup.add_argument('--daemon-stop', action='store_true',
+                        help="stop a running daemon")
+    rgroup.add_argument('--bench', nargs='?', default=None, const='',
+                        metavar='<results_file>',
+                        help="run the benchmarks on a synthetic website")
     parser.add_argument('-s', '--serve', nargs='?',
                         default=None, const='localhost',
                         metavar='<host>',
@@ -74,6 +113,34 @@ def main():
                         metavar='<config_file>',
                         help="use a config file other than the default "
                              "(config.yaml)")
+    parser.add_argument('--stats', action='store_true',
+                        help="report the time spent in every build phase")
+    parser.add_argument('--stats-json', default=None,
+                        metavar='<stats_file>',
+                        help="write the build statistics to a JSON file")
+    parser.add_argument('--memprofile', action='store_true',
+                        help="report the memory allocated in every build "
+                             "phase")
+    parser.add_argument('--trace', default=None,
+                        metavar='<trace_file>',
+                        help="write a trace of the build (Chrome trace "
+                             "event format)")
+    parser.add_argument('--via-daemon', action='store_true',
+                        help="build through a running daemon")
+    parser.add_argument('--socket', default='.pynfact.sock',
+                        metavar='<socket>',
+                        help="set socket where the daemon listens "
+                             "(.pynfact.sock)")
+    parser.add_argument('--compare', default=None,
+                        metavar='<baseline_file>',
+                        help="compare the benchmarks with a baseline")
+    parser.add_argument('--tolerance', default=0.1, type=float,
+                        metavar='<ratio>',
+                        help="set regression tolerance of the benchmarks "
+                             "(0.1)")
+    parser.add_argument('--repeat', default=5, type=int,
+                        metavar='<runs>',
+                        help="set number of runs of the benchmarks (5)")
     parser.add_argument('-l', '--log', default='pynfact.log',
                         metavar='<log_file>',
                         help="set file where to log errors "
@@ -85,13 +152,26 @@ def main():
     args = parser.parse_args(None if sys.argv[1:] else ['--help'])
 
     # Set the logger
-    logger = set_logger(args.verbose, error_log=args.log)
+    logger = set_logger(args.verbose, error_log=args.log, queued=True)
 
     # Process arguments
     if args.init:
         arg_init(logger, args.init)
+    elif args.build and args.via_daemon:
+        arg_build_via_daemon(logger, config_file=args.config,
+                             socket_path=args.socket)
     elif args.build:
-        arg_build(logger, config_file=args.config)
+        arg_build(logger, config_file=args.config,
+                  show_stats=args.stats, stats_json=args.stats_json,
+                  trace_file=args.trace, memprofile=args.memprofile)
+    elif args.daemon:
+        arg_daemon(logger, socket_path=args.socket)
+    elif args.daemon_stop:
+        arg_daemon_stop(logger, socket_path=args.socket)
+    elif args.bench is not None:
+        arg_bench(logger, results_file=args.bench or None,
+                  baseline_file=args.compare, tolerance=args.tolerance,
+                  repeat=args.repeat)
 
     if args.serve is not None:
         arg_serve(logger, args.serve, int(args.port))
@@ -18,6 +18,7 @@ Meta information processor from Markdown or reStructuredText file.
     to one universal language instead of hardcoding the
     internationalization.
 """
+import functools
 import markdown
 import re
 import sys
@@ -28,6 +29,50 @@ from pynfact.dataman import or_array_in
 from pynfact.struri import date_iso, strip_html_tags
 
 
+# Anything that may be Markdown syntax in a short piece of metadata:
+# inline markup, HTML and entities, line breaks, block markers at the
+# start (headers, lists, quotes, rules), and spaces around the text
+INLINE_MD_SYNTAX = re.compile(
+    r'[\\`*_\[\]<>&#\n\r\t]|^[\s\-+=]|^\d+[.)]|\s$')
+
+# Block elements removed from the rendered metadata
+INLINE_MD_BLOCKS = re.compile(r'</*(p|br)[^>]*?>')
+
+# Markdown converter shared by all the metadata, created when needed
+_inline_md = None
+
+
+@functools.lru_cache(maxsize=4096)
+def inline_markdown(text):
+    """Render a short piece of metadata written in Markdown.
+
+    The text is rendered as a paragraph, and then the ``p`` and ``br``
+    elements are removed, leaving only the inline HTML.  A text without
+    any Markdown syntax is returned as it is, since it would be
+    rendered the same way.  The rendered values are kept, since many of
+    them, such as the copyright, are the same in all the documents.
+
+    :param text: Markdown text
+    :type text: str
+    :return: Inline HTML
+    :rtype: str
+
+    :Example:
+
+    >>> inline_markdown('A *title*')
+    'A <em>title</em>'
+
+    .. versionadded:: 1.4.0
+    """
+    global _inline_md
+
+    if not INLINE_MD_SYNTAX.search(text):
+        return text
+    if _inline_md is None:
+        _inline_md = markdown.Markdown()
+    return INLINE_MD_BLOCKS.sub('', _inline_md.reset().convert(text))
+
+
 class Meta:
     """Meta information processor.
 
@@ -417,11 +462,13 @@ class Meta:
         :type period: bool
         :return: The value of the meta key, or the default value
         :rtype: str
+
+        .. versionchanged:: 1.4.0
+            Render the value with :func:`inline_markdown`.
         """
         value = or_array_in(self.meta, *values)
         if value:
-            fmt = markdown.markdown(joint.join(value))
-            parsed_str = re.sub(r'</*(p|br)[^>]*?>', '', fmt)
+            parsed_str = inline_markdown(joint.join(value))
         else:
             parsed_str = default
 
@@ -5,8 +5,9 @@ Markdown translation to HTML and metadata retrieval.
 :copyright: © 2012-2025, J. A. Corbal
 :license: MIT
 """
+import pynfact.parsers
+
 from pynfact.fileman import has_extension_md, has_extension_rst
-from pynfact.parsers import ParserMd, ParserRst
 
 
 class Parser:
@@ -17,7 +18,8 @@ class Parser:
         call one or other parser.
     """
 
-    def __init__(self, filename, encoding='utf-8', logger=None):
+    def __init__(self, filename, encoding='utf-8', logger=None,
+                 markdown_backend='python-markdown'):
         """Constructor.
 
         Depending on the extension, the markup parser will be a Markdown
@@ -30,13 +32,22 @@ class Parser:
         :type encoding: str
         :param logger: Logger where to store activity in
         :type logger: logging.Logger
+        :param markdown_backend: Markdown engine, as in
+            :mod:`parsers.mdbackends`
+        :type markdown_backend: str
+
+        .. versionchanged:: 1.4.0
+            Only the parser of the markup language in use is imported.
+
+        .. versionchanged:: 1.4.0
+            Add the ``markdown_backend`` argument.
         """
         if has_extension_rst(filename):
-            parser = ParserRst
+            self.parser = pynfact.parsers.ParserRst(filename, encoding,
+                                                    logger=logger)
         elif has_extension_md(filename):
-            parser = ParserMd
-
-        self.parser = parser(filename, encoding, logger=logger)
+            self.parser = pynfact.parsers.ParserMd(
+                filename, encoding, logger=logger, backend=markdown_backend)
 
     def html(self):
         """Generate HTML from a MarkUP LANGuage file."""
@@ -28,9 +28,18 @@
 """
 Markup languages parsers.
 
+The parsers are imported the first time they are used, so docutils is
+not loaded when building a website without reStructuredText files, and
+neither of them when not building at all.
+
 :copyright: © 2012-2025, J. A. Corbal
 :license: MIT
+
+.. versionchanged:: 1.4.0
+    Import the parsers lazily.
 """
+import importlib
+
 __author__ = "J. A. Corbal"
 __copyright__ = "Copyright 2012-2025, J. A. Corbal"
 __email__ = "jacorbal@gmail.com"
@@ -39,5 +48,27 @@ __maintainer__ = "J. A. Corbal"
 __status__ = "Production"
 
 
-from pynfact.parsers.parsermd import ParserMd
-from pynfact.parsers.parserrst import ParserRst
+# Module where every parser is defined
+_PARSERS = {
+    'ParserMd': 'pynfact.parsers.parsermd',
+    'ParserRst': 'pynfact.parsers.parserrst',
+}
+
+__all__ = list(_PARSERS)
+
+
+def __getattr__(name):
+    """Import a parser the first time it is accessed.
+
+    :param name: Parser name
+    :type name: str
+    :return: Parser class
+    :rtype: type
+    :raise AttributeError: If there is no parser with that name
+    """
+    if name not in _PARSERS:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name))
+    parser = getattr(importlib.import_module(_PARSERS[name]), name)
+    globals()[name] = parser
+    return parser
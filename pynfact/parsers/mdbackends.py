@@ -0,0 +1,225 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Alternative Markdown engines.
+
+By default, Markdown is parsed with Python-Markdown, as described in
+:class:`ParserMd`.  Other engines may be chosen with the configuration
+key ``markdown_backend``, if installed:
+
+* ``markdown-it``: markdown-it-py, with the plugins of mdit-py-plugins
+  (``pip install pynfact[markdown-it]``).
+* ``mistune``: Mistune 3 (``pip install pynfact[mistune]``).
+
+Every backend renders the body of the documents, without the metadata
+header, which is read by :func:`split_meta` in the same way as the
+``meta`` extension of Python-Markdown.  The code blocks are highlighted
+by the same :func:`highlight_code` as with Python-Markdown, through the
+highlight cache, so the highlighted code looks the same with every
+backend; the rest of the HTML may be slightly different, which can be
+checked with ``python -m pynfact.bench markdown`` before switching to
+another backend.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import functools
+import re
+
+
+# Name of the default backend, Python-Markdown, used by ``ParserMd``
+DEFAULT_BACKEND = 'python-markdown'
+
+# Syntax of the metadata header, as in the ``meta`` extension of
+# Python-Markdown
+META_RE = re.compile(r'^[ ]{0,3}(?P<key>[A-Za-z0-9_-]+):\s*(?P<value>.*)')
+META_MORE_RE = re.compile(r'^[ ]{4,}(?P<value>.*)')
+BEGIN_RE = re.compile(r'^-{3}(\s.*)?')
+END_RE = re.compile(r'^(-{3}|\.{3})(\s.*)?')
+
+
+def split_meta(text):
+    """Split the metadata header from the body of a Markdown document.
+
+    :param text: Markdown document
+    :type text: str
+    :return: Metadata, as lists of values by lowercase key, and body
+    :rtype: tuple
+
+    :Example:
+
+    >>> split_meta('Title: A title\\nTags: one, two\\n\\nBody')
+    ({'title': ['A title'], 'tags': ['one, two']}, 'Body')
+    """
+    lines = text.replace('\r\n', '\n').replace('\r', '\n') \
+        .expandtabs(4).split('\n')
+
+    meta = dict()
+    key = None
+    start = 0
+    if lines and BEGIN_RE.match(lines[0]):
+        start = 1
+    for index in range(start, len(lines)):
+        line = lines[index]
+        if line.strip() == '' or END_RE.match(line):
+            start = index + 1
+            break
+        match = META_RE.match(line)
+        if match:
+            key = match.group('key').lower().strip()
+            meta.setdefault(key, []).append(match.group('value').strip())
+            continue
+        match = META_MORE_RE.match(line)
+        if match and key:
+            meta[key].append(match.group('value').strip())
+            continue
+        start = index
+        break
+    else:
+        start = len(lines)
+
+    return meta, '\n'.join(lines[start:])
+
+
+def highlight_block(code, lang=None, fenced=True):
+    """Highlight a code block as the ``codehilite`` extension does.
+
+    :param code: Source code
+    :type code: str
+    :param lang: Language of the code, guessed if not given
+    :type lang: str
+    :param fenced: The block is fenced, not indented, so its first line
+        is not taken as a shebang with its language
+    :type fenced: bool
+    :return: HTML of the highlighted code
+    :rtype: str
+    """
+    from pynfact.parsers.parsermd import highlight_code
+
+    return highlight_code(code, shebang=not fenced, lang=lang or None)
+
+
+class MarkdownItBackend:
+    """Render Markdown with markdown-it-py.
+
+    CommonMark, plus tables, strikethrough, footnotes and definition
+    lists.
+
+    .. versionadded:: 1.4.0
+    """
+
+    name = 'markdown-it'
+
+    def __init__(self):
+        """Constructor.
+
+        :raise ImportError: If markdown-it-py is not installed
+        """
+        from markdown_it import MarkdownIt
+        from mdit_py_plugins.deflist import deflist_plugin
+        from mdit_py_plugins.footnote import footnote_plugin
+
+        self.md = MarkdownIt('commonmark', {'html': True}) \
+            .enable(['table', 'strikethrough']) \
+            .use(footnote_plugin) \
+            .use(deflist_plugin)
+        self.md.add_render_rule('fence', self._fence)
+        self.md.add_render_rule('code_block', self._code_block)
+
+    def render(self, text):
+        """Render the body of a document.
+
+        :param text: Markdown text, without metadata
+        :type text: str
+        :return: HTML
+        :rtype: str
+        """
+        return self.md.render(text)
+
+    @staticmethod
+    def _fence(renderer, tokens, idx, options, env):
+        """Render a fenced code block."""
+        info = tokens[idx].info.split()
+        return highlight_block(tokens[idx].content,
+                               info[0] if info else None)
+
+    @staticmethod
+    def _code_block(renderer, tokens, idx, options, env):
+        """Render an indented code block."""
+        return highlight_block(tokens[idx].content, fenced=False)
+
+
+class MistuneBackend:
+    """Render Markdown with Mistune.
+
+    Mistune syntax, plus tables, strikethrough, footnotes, definition
+    lists and abbreviations.
+
+    .. versionadded:: 1.4.0
+    """
+
+    name = 'mistune'
+
+    def __init__(self):
+        """Constructor.
+
+        :raise ImportError: If Mistune 3 is not installed
+        """
+        import mistune
+
+        class Renderer(mistune.HTMLRenderer):
+            def block_code(self, code, info=None):
+                info = info.split() if info else None
+                return highlight_block(code, info[0] if info else None,
+                                       fenced=info is not None)
+
+        self.md = mistune.create_markdown(
+            escape=False, renderer=Renderer(escape=False),
+            plugins=['table', 'strikethrough', 'footnotes', 'def_list',
+                     'abbr'])
+
+    def render(self, text):
+        """Render the body of a document.
+
+        :param text: Markdown text, without metadata
+        :type text: str
+        :return: HTML
+        :rtype: str
+        """
+        return self.md(text)
+
+
+# Alternative backends by name
+BACKENDS = {
+    MarkdownItBackend.name: MarkdownItBackend,
+    MistuneBackend.name: MistuneBackend,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def markdown_backend(name):
+    """Get an alternative backend, created once and shared.
+
+    :param name: Backend name, one of :data:`BACKENDS`
+    :type name: str
+    :return: Backend
+    :raise KeyError: If there is no backend with that name
+    :raise ImportError: If the backend is not installed
+
+    :Example:
+
+    Every backend installed highlights the fenced code blocks:
+
+    >>> highlighted = []
+    >>> for name in sorted(BACKENDS):
+    ...     try:
+    ...         backend = markdown_backend(name)
+    ...     except ImportError:
+    ...         continue
+    ...     html = backend.render('```python\\nx = 1\\n```\\n')
+    ...     highlighted.append(html.startswith('<div class="codehilite">'))
+    >>> all(highlighted)
+    True
+    """
+    return BACKENDS[name]()
@@ -6,6 +6,161 @@ Markdown translation to HTML and metadata retrieval.
 :license: MIT
 """
 import markdown
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, HiliteTreeprocessor
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+from pynfact.highlight import HIGHLIGHT_CACHE, HighlightCache
+from pynfact.parsers.mdbackends import (DEFAULT_BACKEND, markdown_backend,
+                                        split_meta)
+
+
+def highlight_code(code, shebang=True, **options):
+    """Highlight a code block as ``codehilite`` does, or take it from
+    the highlight cache.
+
+    It's the only place where a code block of a Markdown document is
+    highlighted on its own, whatever the engine, so every code block
+    looks the same with every engine.
+
+    :param code: Source code
+    :type code: str
+    :param shebang: Look for the language in the first line
+    :type shebang: bool
+    :param options: Options of ``CodeHilite``, such as ``lang``,
+        ``style`` or ``tab_length``
+    :return: HTML of the code block
+    :rtype: str
+
+    .. versionadded:: 1.4.0
+
+    .. seealso:: :mod:`highlight`.
+    """
+    key = HighlightCache.key('hilite', code, shebang,
+                             sorted(options.items()))
+    return HIGHLIGHT_CACHE.get(key, lambda: CodeHilite(
+        code, **options).hilite(shebang=shebang))
+
+
+class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+    """Highlight the indented code blocks through the highlight cache.
+
+    .. versionadded:: 1.4.0
+
+    .. seealso:: :mod:`highlight`.
+    """
+
+    def run(self, root):
+        """Highlight every code block, or take it from the cache.
+
+        It's the same as the treeprocessor of ``codehilite``, but every
+        block is highlighted by :func:`highlight_code`, with the options
+        of the extension.
+
+        :param root: Root element of the document
+        :type root: xml.etree.ElementTree.Element
+        """
+        for block in root.iter('pre'):
+            if len(block) != 1 or block[0].tag != 'code' or \
+                    block[0].text is None:
+                continue
+            config = self.config.copy()
+            html = highlight_code(
+                self.code_unescape(block[0].text),
+                tab_length=self.md.tab_length,
+                style=config.pop('pygments_style', 'default'), **config)
+            placeholder = self.md.htmlStash.store(html)
+            block.clear()
+            block.tag = 'p'
+            block.text = placeholder
+
+
+class CachedFencedBlockPreprocessor(FencedBlockPreprocessor):
+    """Highlight the fenced code blocks through the highlight cache.
+
+    .. versionadded:: 1.4.0
+
+    .. seealso:: :mod:`highlight`.
+    """
+
+    def run(self, lines):
+        """Highlight every fenced block, or take it from the cache.
+
+        Every block is handed on its own to the preprocessor of
+        ``fenced_code``, which stores its HTML; that HTML is identified
+        by the whole block (its code, language and attributes), and the
+        options of the extensions used to make it.
+
+        :param lines: Lines of the document
+        :type lines: list
+        :return: Lines, with a placeholder for every fenced block
+        :rtype: list
+        """
+        if not self.checked_for_deps:
+            super().run([])
+        stash = self.md.htmlStash
+        text = '\n'.join(lines)
+        index = 0
+        while True:
+            m = self.FENCED_BLOCK_RE.search(text, index)
+            if not m:
+                break
+
+            block = m.group(0)
+            key = HighlightCache.key(
+                'fenced', block, sorted(self.codehilite_conf.items()),
+                self.use_attr_list, sorted(self.config.items()))
+            stored = stash.html_counter
+            html = HIGHLIGHT_CACHE.get(key, lambda: self._fenced(block))
+            if html is None:
+                # Not a valid block, such as one with unbalanced braces
+                index = m.end('attrs') if m.group('attrs') else m.end()
+                continue
+            if stash.html_counter == stored:
+                stash.store(html)
+            placeholder = stash.get_placeholder(stash.html_counter - 1)
+            text = '{}\n{}\n{}'.format(text[:m.start()], placeholder,
+                                       text[m.end():])
+            index = m.start() + 1 + len(placeholder)
+
+        return text.split('\n')
+
+    def _fenced(self, block):
+        """Get the HTML of a fenced block, or ``None`` if it's invalid."""
+        stored = self.md.htmlStash.html_counter
+        super().run(block.split('\n'))
+        if self.md.htmlStash.html_counter == stored:
+            return None
+        return self.md.htmlStash.rawHtmlBlocks[-1]
+
+
+class HighlightCacheExtension(Extension):
+    """Highlight the code blocks through the highlight cache.
+
+    It replaces the processors of the ``codehilite`` and ``fenced_code``
+    extensions (the latter, part of ``extra``) with their cached
+    versions, so it must be given after them.
+
+    .. versionadded:: 1.4.0
+
+    .. seealso:: :mod:`highlight`.
+    """
+
+    def extendMarkdown(self, md):
+        """Replace the processors of the code blocks, if registered.
+
+        :param md: Markdown instance
+        :type md: markdown.Markdown
+        """
+        if 'fenced_code_block' in md.preprocessors:
+            fenced = md.preprocessors['fenced_code_block']
+            md.preprocessors.register(
+                CachedFencedBlockPreprocessor(md, fenced.config),
+                'fenced_code_block', 25)
+        if 'hilite' in md.treeprocessors:
+            hiliter = CachedHiliteTreeprocessor(md)
+            hiliter.config = md.treeprocessors['hilite'].config
+            md.treeprocessors.register(hiliter, 'hilite', 30)
 
 
 class ParserMd:
@@ -19,10 +174,18 @@ class ParserMd:
         This class, formerly ``Mulang``, now it's just a parser for
         Markdown since reStrucutedText support was added.
 
+    .. versionchanged:: 1.4.0
+        The code blocks are highlighted through the highlight cache.
+
+    .. versionchanged:: 1.4.0
+        The Markdown engine may be other than Python-Markdown, as in
+        :mod:`mdbackends`.
+
     .. seealso:: :class:`ParserRst` and :mod:`parser`.
     """
 
-    def __init__(self, input_data, encoding='utf-8', logger=None):
+    def __init__(self, input_data, encoding='utf-8', logger=None,
+                 backend=DEFAULT_BACKEND):
         """Constructor.
 
         This class has methods to parse the markup language and get the
@@ -35,28 +198,44 @@ class ParserMd:
         :type encoding: str
         :param logger: Logger where to store activity in
         :type logger: logging.Logger
+        :param backend: Markdown engine, as in :mod:`mdbackends`
+        :type backend: str
+        :raise KeyError: If there is no backend with that name
+        :raise ImportError: If the backend is not installed
+
+        .. versionchanged:: 1.4.0
+            Add the ``backend`` argument.
         """
         self.input_data = input_data
         self.encoding = encoding
         self.logger = logger
 
-        self.md = markdown.Markdown(
-            extensions=['markdown.extensions.extra',
-                        'markdown.extensions.toc',
-                        'markdown.extensions.abbr',
-                        'markdown.extensions.def_list',
-                        'markdown.extensions.footnotes',
-                        'markdown.extensions.codehilite',
-                        'markdown.extensions.meta'],
-            encoding=encoding,
-            output_format='html5')
+        # Alternative engine, if any, or Python-Markdown
+        if backend != DEFAULT_BACKEND:
+            self.backend = markdown_backend(backend)
+        else:
+            self.backend = None
+            self.md = markdown.Markdown(
+                extensions=['markdown.extensions.extra',
+                            'markdown.extensions.toc',
+                            'markdown.extensions.abbr',
+                            'markdown.extensions.def_list',
+                            'markdown.extensions.footnotes',
+                            'markdown.extensions.codehilite',
+                            'markdown.extensions.meta',
+                            HighlightCacheExtension()],
+                encoding=encoding,
+                output_format='html5')
 
     def html(self):
         """Generate HTML from a Markdown file."""
         with open(self.input_data, "r", encoding=self.encoding) as f:
             text = f.read()
 
-        html = self.md.convert(text)
+        if self.backend:
+            html = self.backend.render(split_meta(text)[1])
+        else:
+            html = self.md.convert(text)
         self.logger and self.logger.debug(
             'Parsed text body of: "{}"'.format(self.input_data))
 
@@ -81,8 +260,12 @@ class ParserMd:
         with open(self.input_data, "r", encoding=self.encoding) as f:
             text = f.read()
 
-        self.md.convert(text)
+        if self.backend:
+            meta = split_meta(text)[0]
+        else:
+            self.md.convert(text)
+            meta = self.md.Meta
         self.logger and self.logger.debug(
             'Parsed metadata of: "{}"'.format(self.input_data))
 
-        return self.md.Meta
+        return meta
@@ -14,11 +14,170 @@ reStructuredText translation to HTML and metadata retrieval.
     document metadata.  The ``fragment`` and the ``body`` parts of the
     publisher data structure seem to have also some erratic behaviour.
     It's required ``docutils>=0.15``.
+
+.. versionchanged:: 1.4.0
+    The settings, and the reader, parser and writers of docutils are
+    created once, and reused for every file through a ``Publisher``.
 """
-from docutils.core import publish_doctree, publish_parts
+import copy
+import functools
+
+from docutils import io, nodes
+from docutils.core import Publisher
 from docutils.nodes import docinfo
+from docutils.parsers import rst
+from docutils.parsers.rst import directives
+from docutils.parsers.rst.directives.body import CodeBlock
+from docutils.readers import standalone
+from docutils.utils.code_analyzer import Lexer, LexerError, NumberLines
+from docutils.writers import null
 from docutils.writers.html5_polyglot import Writer
 
+from pynfact.highlight import HIGHLIGHT_CACHE, HighlightCache
+
+
+class CachedLexer(Lexer):
+    """Split a code block in tokens through the highlight cache.
+
+    .. versionadded:: 1.4.0
+
+    .. seealso:: :mod:`highlight`.
+    """
+
+    def __iter__(self):
+        """Yield the tokens of the code, or take them from the cache.
+
+        :return: Tokens, as pairs of CSS classes and text
+        :rtype: iterator
+        """
+        if self.lexer is None:
+            return super().__iter__()
+
+        key = HighlightCache.key('tokens', self.language, self.tokennames,
+                                 self.code)
+        tokens = HIGHLIGHT_CACHE.get(key, lambda: [
+            [classes, value] for classes, value in super(
+                CachedLexer, self).__iter__()])
+        return ((classes, value) for classes, value in tokens)
+
+
+class CachedCodeBlock(CodeBlock):
+    """The ``code`` directive, highlighting through the highlight cache.
+
+    It's the same as the ``code`` directive of docutils, but the tokens
+    of the code are split by a :class:`CachedLexer`.
+
+    .. versionadded:: 1.4.0
+
+    .. seealso:: :mod:`highlight`.
+    """
+
+    def run(self):
+        """Make the literal block of the code, with a node per token.
+
+        :return: Literal block
+        :rtype: list
+        """
+        self.assert_has_content()
+        language = self.arguments[0] if self.arguments else ''
+        classes = ['code'] + ([language] if language else []) + \
+            self.options.get('class', [])
+        code = '\n'.join(self.content)
+
+        try:
+            tokens = CachedLexer(
+                code, language,
+                self.state.document.settings.syntax_highlight)
+        except LexerError as error:
+            if self.state.document.settings.report_level > 2:
+                # Warnings are not reported, so insert it as plain text
+                tokens = CachedLexer(code, language, 'none')
+            else:
+                raise self.warning(error)
+
+        if 'number-lines' in self.options:
+            startline = self.options.get('number-lines') or 1
+            tokens = NumberLines(tokens, startline,
+                                 startline + len(self.content))
+
+        node = nodes.literal_block(code, classes=classes)
+        self.add_name(node)
+        if 'source' in self.options:
+            node['source'] = self.options.get('source')
+        for classes, value in tokens:
+            if classes:
+                node += nodes.inline(value, value, classes=classes)
+            else:
+                node += nodes.Text(value)
+
+        return [node]
+
+
+# The ``code`` directive of the parsers of reStructuredText, under all
+# its names
+for name in ('code', 'code-block', 'sourcecode'):
+    directives.register_directive(name, CachedCodeBlock)
+
+
+@functools.lru_cache(maxsize=None)
+def components():
+    """Create the docutils components shared by all the files.
+
+    None of them keeps anything from a file once the next one is
+    published, so they can be reused instead of created for every file.
+
+    :return: Reader, parser, HTML writer, and writer of doctrees only
+    :rtype: tuple
+
+    .. versionadded:: 1.4.0
+    """
+    return standalone.Reader(), rst.Parser(), Writer(), null.Writer()
+
+
+@functools.lru_cache(maxsize=None)
+def frozen_settings(overrides):
+    """Build the docutils settings from the defaults and the overrides.
+
+    Building them takes a whole command line parser of docutils, with
+    the settings of all the components, and reading its configuration
+    files, so it's done once for every set of overrides.
+
+    :param overrides: Settings overrides, as ``(name, value)`` pairs
+    :type overrides: tuple
+    :return: Settings, not to be modified
+    :rtype: docutils.frontend.Values
+
+    .. versionadded:: 1.4.0
+    """
+    reader, parser, writer, _ = components()
+    return Publisher(reader, parser, writer).get_settings(**dict(overrides))
+
+
+def publish(text, settings, doctree_only=False):
+    """Publish a reStructuredText document with the shared components.
+
+    :param text: reStructuredText source
+    :type text: str
+    :param settings: Settings, as in :func:`frozen_settings`
+    :type settings: docutils.frontend.Values
+    :param doctree_only: Stop after building the doctree
+    :type doctree_only: bool
+    :return: Publisher, with the ``document`` and the ``writer.parts``
+    :rtype: docutils.core.Publisher
+
+    .. versionadded:: 1.4.0
+    """
+    reader, parser, writer, null_writer = components()
+    publisher = Publisher(reader, parser,
+                          null_writer if doctree_only else writer,
+                          settings=copy.copy(settings),
+                          source_class=io.StringInput,
+                          destination_class=io.StringOutput)
+    publisher.set_source(text)
+    publisher.set_destination()
+    publisher.publish()
+    return publisher
+
 
 class ParserRst:
     """Generate HTML body from a reStructuredText source file.
@@ -26,6 +185,9 @@ class ParserRst:
     .. versionadded:: 1.3.1a4
         Add reStructuredText support.
 
+    .. versionchanged:: 1.4.0
+        The code blocks are highlighted through the highlight cache.
+
     .. seealso:: :class:`ParserMd` and :mod:`parser`.
     """
 
@@ -86,9 +248,8 @@ class ParserRst:
         with open(self.input_data, "r", encoding=self.encoding) as f:
             text = f.read()
 
-        html = publish_parts(text,
-                             writer=Writer(),
-                             settings_overrides=self.settings).get('fragment')
+        html = publish(text, self._frozen_settings()).writer.parts.get(
+            'fragment')
         self.logger and self.logger.debug(
             'Parsed text body of: "{}"'.format(self.input_data))
 
@@ -130,8 +291,8 @@ class ParserRst:
         with open(self.input_data, "r", encoding=self.encoding) as f:
             text = f.read()
 
-        doctree = publish_doctree(text,  # writer=Writer(),
-                                  settings_overrides=self.settings)
+        doctree = publish(text, self._frozen_settings(),
+                          doctree_only=True).document
 
         # Generate dictionary of meta information {'field': 'value'}
         for info in doctree.traverse(docinfo):
@@ -156,3 +317,14 @@ class ParserRst:
             'Parsed metadata of: "{}"'.format(self.input_data))
 
         return meta
+
+    def _frozen_settings(self):
+        """Get the docutils settings with the overrides of this parser.
+
+        :return: Settings, shared by all the parsers with the same
+            overrides
+        :rtype: docutils.frontend.Values
+
+        .. versionadded:: 1.4.0
+        """
+        return frozen_settings(tuple(sorted(self.settings.items())))
@@ -0,0 +1,139 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Precompressed copies of the output files.
+
+Web servers may send a compressed copy of a file, such as
+``index.html.gz`` next to ``index.html``, instead of compressing the
+file on every request (``gzip_static on`` in nginx).  After the build,
+every text file of the website (HTML pages, feeds, style sheets,
+scripts...) gets its compressed copy, with the maximum compression.
+
+The compressed copy has the same modification time as the original, so
+the web server knows it's up to date.  That's also how the copies still
+up to date are found in the next builds: only the files rewritten by
+the build, whose modification time has changed, are compressed again.
+In the same pass, the compressed copies of the text files no longer in
+the website are removed, so the web server never sends a page removed
+from the website.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import concurrent.futures
+import gzip
+import os
+
+
+# Extensions of the files to compress, in lowercase
+COMPRESSIBLE_EXTENSIONS = frozenset((
+    '.css', '.htm', '.html', '.js', '.json', '.map', '.svg', '.txt',
+    '.xml'))
+
+
+def is_compressible(path):
+    """Check if a file should have a compressed copy.
+
+    :param path: File name
+    :type path: str
+    :return: ``True`` if the file is a text file, by its extension
+    :rtype: bool
+    """
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def gzip_file(path, level=9):
+    """Write the compressed copy of a file, ended in ``.gz``.
+
+    The copy is written to a temporary file first, so a web server never
+    sends it half written, and it gets the modification time of the
+    original file.  The header of the copy has no file name, and the
+    same time, so compressing the same file twice gives the same copy.
+
+    :param path: File to compress
+    :type path: str
+    :param level: Compression level, from 1 to 9
+    :type level: int
+    :return: Size of the compressed copy, in bytes
+    :rtype: int
+    """
+    st = os.stat(path)
+    tmp_path = path + '.gz~'
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as f:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=f,
+                           compresslevel=level,
+                           mtime=int(st.st_mtime)) as gz:
+            gz.write(src.read())
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp_path, path + '.gz')
+    return os.path.getsize(path + '.gz')
+
+
+def outdated(directory):
+    """Find the files whose compressed copy is missing or outdated.
+
+    Find also the compressed copies left without their original file,
+    but only those of the text files, so any other compressed file of
+    the website, such as ``archive.tar.gz``, is kept.
+
+    :param directory: Directory of the website
+    :type directory: str
+    :return: Files to compress, and compressed copies to remove
+    :rtype: tuple
+    """
+    to_compress = []
+    to_remove = []
+    for root, dirs, files in os.walk(directory):
+        mtimes = dict()
+        for name in files:
+            if is_compressible(name) or name.endswith('.gz'):
+                try:
+                    mtimes[name] = os.stat(
+                        os.path.join(root, name)).st_mtime_ns
+                except OSError:
+                    continue
+
+        for name, mtime in mtimes.items():
+            if not name.endswith('.gz'):
+                if mtimes.get(name + '.gz') != mtime:
+                    to_compress.append(os.path.join(root, name))
+            elif is_compressible(name[:-3]) and name[:-3] not in mtimes:
+                to_remove.append(os.path.join(root, name))
+
+    return sorted(to_compress), sorted(to_remove)
+
+
+def precompress_tree(directory, threads=None, level=9):
+    """Keep the compressed copies of a website up to date.
+
+    :param directory: Directory of the website
+    :type directory: str
+    :param threads: Number of threads compressing files, by default
+        one per CPU
+    :type threads: int
+    :param level: Compression level, from 1 to 9
+    :type level: int
+    :return: Files compressed, bytes of their compressed copies, and
+        compressed copies removed
+    :rtype: tuple
+    """
+    to_compress, to_remove = outdated(directory)
+    removed = 0
+    for path in to_remove:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    if not to_compress:
+        return 0, 0, removed
+
+    threads = threads or os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(
+            min(threads, len(to_compress)),
+            thread_name_prefix='pynfact-gzip') as executor:
+        sizes = list(executor.map(lambda path: gzip_file(path, level),
+                                  to_compress))
+
+    return len(sizes), sum(sizes), removed
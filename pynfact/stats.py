@@ -0,0 +1,202 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Build statistics: time spent in every phase, and global counters.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+# Global counters of a build, in the order they are reported
+COUNTERS = (
+    'files_parsed',        # Source files parsed (body or metadata)
+    'cache_hits',          # Parsed content taken from the cache
+    'highlight_hits',      # Code blocks taken from the highlight cache
+    'highlight_misses',    # Code blocks highlighted by Pygments
+    'fragment_hits',       # Template fragments taken from the cache
+    'fragment_misses',     # Template fragments rendered
+    'templates_compiled',  # Jinja2 templates compiled
+    'pages_rendered',      # Pages rendered from a template
+    'pages_skipped',       # Pages not rendered, with the same fingerprint
+    'pages_written',       # Output files written
+    'pages_unchanged',     # Output files skipped, with the same content
+    'bytes_written',       # Bytes of all the output files written
+    'files_compressed',    # Compressed copies of the output files
+    'images_resized',      # Image derivatives resized, not in the cache
+    'images_written',      # Image derivatives copied to the website
+    'images_unchanged',    # Image derivatives skipped, with the same content
+)
+
+
+class BuildStats:
+    """Collect the statistics of a build.
+
+    Every phase records its wall time, its CPU time, and the number of
+    items it has produced (parsed files, rendered pages, copied files,
+    etc.).  A phase may be entered several times, adding up the values.
+
+    :Example:
+
+    >>> stats = BuildStats()
+    >>> with stats.phase('entries'):
+    ...     stats.count('pages_rendered')
+
+    When ``memprofile`` is set, the memory allocations are traced with
+    :mod:`tracemalloc`, and every phase records also the peak of memory
+    allocated during the phase, the memory it leaves allocated when it
+    ends, and the source lines that have allocated most of it.  This
+    slows down the build noticeably.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, memprofile=False, top_sites=5):
+        """Constructor.
+
+        :param memprofile: Trace the memory allocations of every phase
+        :type memprofile: bool
+        :param top_sites: Number of allocation sites to keep per phase
+        :type top_sites: int
+        """
+        self.phases = dict()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.current = None
+        self.memprofile = memprofile
+        self.top_sites = top_sites
+        if memprofile and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measure a phase of the build.
+
+        :param name: Phase name
+        :type name: str
+        """
+        parent, self.current = self.current, name
+        phase = self.phases.setdefault(
+            name, {'wall': 0.0, 'cpu': 0.0, 'items': 0})
+        self.memprofile and tracemalloc.clear_traces()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield phase
+        finally:
+            phase['wall'] += time.perf_counter() - wall
+            phase['cpu'] += time.process_time() - cpu
+            self.current = parent
+            self.memprofile and self._record_memory(phase)
+
+    def _record_memory(self, phase):
+        """Record the memory allocated during a phase.
+
+        The traces are cleared when every phase starts, so only the
+        memory allocated by the phase itself is taken into account,
+        and the snapshot is small and fast to process.
+
+        :param phase: Measures of the phase
+        :type phase: dict
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        ignore = (tracemalloc.__file__, __file__, '<unknown>')
+        sites = [stat for stat in
+                 tracemalloc.take_snapshot().statistics('lineno')
+                 if stat.traceback[0].filename not in ignore
+                 and not stat.traceback[0].filename.startswith('<frozen')]
+
+        phase['mem_peak'] = max(phase.get('mem_peak', 0), peak)
+        phase['mem_retained'] = phase.get('mem_retained', 0) + current
+        phase['mem_top'] = [
+            {'site': '{}:{}'.format(stat.traceback[0].filename,
+                                    stat.traceback[0].lineno),
+             'size': stat.size, 'count': stat.count}
+            for stat in sites[:self.top_sites]]
+
+    def count(self, counter, value=1):
+        """Increase a global counter.
+
+        :param counter: Counter name, one of :data:`COUNTERS`
+        :type counter: str
+        :param value: Value to add
+        :type value: int
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def add_items(self, value=1):
+        """Increase the number of items produced by the current phase.
+
+        :param value: Number of items to add
+        :type value: int
+        """
+        if self.current is not None:
+            self.phases.get(self.current)['items'] += value
+
+    def as_dict(self):
+        """Return the statistics as a dictionary.
+
+        :return: Phases and counters
+        :rtype: dict
+        """
+        return {'wall': sum(p.get('wall') for p in self.phases.values()),
+                'cpu': sum(p.get('cpu') for p in self.phases.values()),
+                'phases': self.phases, 'counters': self.counters}
+
+    def report(self):
+        """Make a human readable report of the statistics.
+
+        :return: Table of the phases followed by the counters
+        :rtype: str
+        """
+        stats = self.as_dict()
+        lines = ['{:<16} {:>10} {:>10} {:>8}'.format(
+            'Phase', 'Wall (s)', 'CPU (s)', 'Items')]
+        for name, phase in stats.get('phases').items():
+            lines.append('{:<16} {:>10.3f} {:>10.3f} {:>8}'.format(
+                name, phase.get('wall'), phase.get('cpu'),
+                phase.get('items')))
+        lines.append('{:<16} {:>10.3f} {:>10.3f}'.format(
+            'Total', stats.get('wall'), stats.get('cpu')))
+        lines.append('')
+        for name, value in stats.get('counters').items():
+            lines.append('{:<27} {:>10}'.format(
+                name.replace('_', ' ').capitalize(), value))
+
+        return '\n'.join(lines)
+
+    def memory_report(self):
+        """Make a human readable report of the memory of every phase.
+
+        :return: Peak and retained memory, and top allocation sites of
+            every phase, or an empty string if not profiled
+        :rtype: str
+        """
+        if not self.memprofile:
+            return ''
+
+        lines = ['{:<16} {:>12} {:>12}'.format(
+            'Phase', 'Peak (KiB)', 'Kept (KiB)')]
+        for name, phase in self.phases.items():
+            lines.append('{:<16} {:>12.1f} {:>12.1f}'.format(
+                name, phase.get('mem_peak', 0) / 1024,
+                phase.get('mem_retained', 0) / 1024))
+            for site in phase.get('mem_top', []):
+                lines.append('    {:>10.1f} KiB {:>7} blocks  {}'.format(
+                    site.get('size') / 1024, site.get('count'),
+                    site.get('site')))
+
+        return '\n'.join(lines)
+
+    def write_json(self, filename):
+        """Write the statistics to a JSON file.
+
+        :param filename: Output file
+        :type filename: str
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write('\n')
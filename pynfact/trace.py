@@ -0,0 +1,146 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Build tracing in the Chrome Trace Event format.
+
+The trace is a JSON file that can be opened in Perfetto
+(https://ui.perfetto.dev) or in ``chrome://tracing``, showing every
+span of the build (phases, source files parsed, templates rendered and
+files written) nested in a timeline, by process and thread.
+
+When tracing is disabled, the builder uses :data:`NULL_TRACER`, whose
+spans do nothing, so the overhead is a single method call per span.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """Record the spans of a build.
+
+    Every span is stored as a "complete event" (phase ``X``) with its
+    start time and duration in microseconds, and the identifiers of the
+    process and thread where it ran.  The clock is monotonic and shared
+    by all the processes of the system, so the events recorded by a
+    worker process in its own ``Tracer`` (such as the ones resizing the
+    images) can be added to the main one with :func:`merge`, and they
+    will be shown in their right place.
+
+    :Example:
+
+    >>> tracer = Tracer()
+    >>> with tracer.span('entries', 'phase'):
+    ...     with tracer.span('render', 'template', file='entry.html'):
+    ...         pass
+    >>> [event['name'] for event in tracer.as_dict()['traceEvents']
+    ...  if event['ph'] == 'X']
+    ['render', 'entries']
+
+    .. versionadded:: 1.4.0
+    """
+
+    enabled = True
+
+    def __init__(self):
+        """Constructor."""
+        self.events = []
+        self.thread_names = dict()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, category='build', **args):
+        """Record a span.
+
+        :param name: Span name
+        :type name: str
+        :param category: Span category, such as "phase" or "parse"
+        :type category: str
+        :param args: Extra information shown along with the span
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            event = {'name': name, 'cat': category, 'ph': 'X',
+                     'ts': start / 1000, 'dur': (end - start) / 1000,
+                     'pid': os.getpid(), 'tid': threading.get_ident()}
+            if args:
+                event['args'] = args
+            thread = threading.current_thread()
+            with self.lock:
+                self.events.append(event)
+                self.thread_names[thread.ident] = thread.name
+
+    def merge(self, events):
+        """Add the events recorded by another tracer.
+
+        :param events: Events of the other tracer
+        :type events: list
+        """
+        with self.lock:
+            self.events.extend(events)
+
+    def as_dict(self):
+        """Return the trace in the Chrome Trace Event format.
+
+        :return: Trace, including the names of processes and threads
+        :rtype: dict
+        """
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.thread_names)
+
+        main_pid = os.getpid()
+        metadata = []
+        for pid, tid in sorted({(e.get('pid'), e.get('tid'))
+                                for e in events}):
+            metadata.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                'args': {'name': threads.get(tid, 'Worker')
+                         if pid == main_pid else 'Worker'}})
+        for pid in sorted({e.get('pid') for e in events}):
+            metadata.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid,
+                'args': {'name': 'pynfact' if pid == main_pid
+                         else 'pynfact worker'}})
+
+        return {'traceEvents': metadata + events,
+                'displayTimeUnit': 'ms'}
+
+    def write(self, filename):
+        """Write the trace to a JSON file.
+
+        :param filename: Output file
+        :type filename: str
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f)
+
+
+class NullTracer:
+    """Tracer that records nothing, used when tracing is disabled.
+
+    .. versionadded:: 1.4.0
+    """
+
+    enabled = False
+    _null_span = contextlib.nullcontext()
+
+    def span(self, name, category='build', **args):
+        """Return a context manager that does nothing."""
+        return self._null_span
+
+    def merge(self, events):
+        """Discard the events of another tracer."""
+
+
+# Shared tracer used when tracing is disabled
+NULL_TRACER = NullTracer()
@@ -0,0 +1,126 @@
+# vim: set ft=python fileencoding=utf-8 tw=72 fdm=indent foldlevel=1 nowrap:
+"""
+Background writing of the output files.
+
+Rendering a page takes CPU time, but writing it takes mostly the time
+of the file system: reading the previous version to compare it, and
+replacing it if it has changed.  The :class:`WritePipeline` hands the
+writing of every page to a small pool of threads, so the next page is
+rendered in the meantime.
+
+The pages waiting to be written are limited in size: when the limit is
+reached, rendering waits for the oldest pages to be written first.  The
+results of the writes (whether every file has been updated or not) are
+handled in the thread that submits them, in the order they were
+submitted, so the callers need no locking at all.
+
+:copyright: © 2012-2025, J. A. Corbal
+:license: MIT
+
+.. versionadded:: 1.4.0
+"""
+import collections
+import concurrent.futures
+
+from pynfact.fileman import write_if_changed
+from pynfact.trace import NULL_TRACER
+
+
+class WritePipeline:
+    """Write files in background threads, with a bounded queue.
+
+    .. versionadded:: 1.4.0
+    """
+
+    def __init__(self, threads=2, max_bytes=16 * 1024 * 1024,
+                 tracer=NULL_TRACER):
+        """Constructor.
+
+        :param threads: Number of writing threads, or ``0`` to write
+            every file as soon as it's submitted
+        :type threads: int
+        :param max_bytes: Maximum size of the files waiting to be
+            written
+        :type max_bytes: int
+        :param tracer: Tracer of the build, where every write is
+            recorded in the thread that does it
+        :type tracer: pynfact.trace.Tracer
+        """
+        self.threads = threads
+        self.max_bytes = max_bytes
+        self.tracer = tracer
+        self.executor = None
+        self.pending = collections.deque()
+        self.pending_paths = set()
+        self.pending_bytes = 0
+
+    def submit(self, path, data, done=None):
+        """Write a file, if its content is different.
+
+        :param path: Destination file
+        :type path: str
+        :param data: New content of the file
+        :type data: bytes
+        :param done: Callable called, in this same thread, once the file
+            is written, with the path, ``True`` if it has been updated,
+            and the size of the content
+        :type done: callable
+        """
+        if self.threads <= 0:
+            updated = self._write(path, data)
+            done and done(path, updated, len(data))
+            return
+
+        # Never write the same file twice at the same time, and never
+        # exceed the maximum size of the queue (unless it's empty)
+        while self.pending and (
+                self.pending_bytes + len(data) > self.max_bytes
+                or path in self.pending_paths):
+            self._collect()
+
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                self.threads, thread_name_prefix='pynfact-writer')
+        future = self.executor.submit(self._write, path, data)
+        self.pending.append((future, path, len(data), done))
+        self.pending_paths.add(path)
+        self.pending_bytes += len(data)
+
+        # Handle the writes already finished, without waiting
+        while self.pending and self.pending[0][0].done():
+            self._collect()
+
+    def flush(self):
+        """Wait until all the submitted files are written.
+
+        :raise OSError: If any file could not be written
+        """
+        while self.pending:
+            self._collect()
+
+    def close(self):
+        """Write all the submitted files, and stop the threads.
+
+        The pipeline may still be used afterwards, starting new threads.
+
+        :raise OSError: If any file could not be written
+        """
+        try:
+            self.flush()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    def _write(self, path, data):
+        """Write a file, if its content is different, tracing it."""
+        with self.tracer.span('write', 'write', output=path):
+            return write_if_changed(path, data)
+
+    def _collect(self):
+        """Wait for the oldest write, and handle its result."""
+        future, path, size, done = self.pending.popleft()
+        self.pending_paths.discard(path)
+        self.pending_bytes -= size
+        updated = future.result()
+        done and done(path, updated, size)
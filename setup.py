@@ -67,6 +67,12 @@ setup(name='pynfact',
           'unidecode >= 0.4.9',
           'setuptools >= 61.0.0',
       ],
+      extras_require={
+          'markdown-it': ['markdown-it-py >= 3.0.0',
+                          'mdit-py-plugins >= 0.4.0'],
+          'mistune': ['mistune >= 3.0.0'],
+          'images': ['pillow >= 9.0.0'],
+      },
       python_requires='>=3.8',
       include_package_data=True,
       )